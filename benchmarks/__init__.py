@@ -0,0 +1,7 @@
+"""Benchmarks for the hw4a, hw4b and hw4c engines.
+
+Each module can be run on its own from the repository root, e.g.
+    python -m benchmarks.bench_derivatives
+and the whole suite, with JSON output and baseline comparison, runs as
+    python -m benchmarks
+"""
@@ -0,0 +1,77 @@
+"""Compares hw4b.track_roots with solving every parameter step cold.
+
+For each family and parameter sweep three ways of following the roots are measured: continuation
+with track_roots; find_all_roots on the 200-point grid at every step; and, like
+root_intersection_finder, fsolve from a fixed set of guesses at every step. The benchmark reports
+equation evaluations (calls and points), the corrector and bracketing iterations of track_roots, the
+wall time, and whether the cold grid solve found the same roots at every step.
+    python -m benchmarks.bench_continuation
+"""
+import time
+import warnings
+
+import numpy as np
+from scipy.optimize import fsolve
+
+import hw4b
+from benchmarks.common import CountingFunction
+
+
+def _cold_grid(family, params, x_range):
+    return [hw4b.find_all_roots(lambda x: family(x, p), *x_range) for p in params]
+
+
+def _cold_fsolve(family, params, guesses):
+    return [[fsolve(lambda x: family(x, p), guess)[0] for guess in guesses] for p in params]
+
+
+def run(steps=200, repeat=3):
+    """Runs the comparison on x - a·cos(x) for a in [1, 10] and cos(b·x)·x³ for b in [1, 3].
+    Args:
+        steps: The number of parameter values in each sweep.
+        repeat: The number of timed repeats; the fastest is reported.
+    Returns:
+        list: One dict per (family, method) with the calls, points, iterations and seconds per step.
+    """
+    cases = [
+        ('x - a cos(x)', hw4b.equation1_family, np.linspace(1, 10, steps), (-15, 15)),
+        ('cos(bx) x^3', hw4b.equation2_family, np.linspace(1, 3, steps), (-5, 5)),
+    ]
+    results = []
+    for name, family, params, x_range in cases:
+        partials = hw4b.partials_of(family)
+        guesses = np.linspace(*x_range, 7)
+        methods = {
+            'track_roots': lambda f: hw4b.track_roots(f, params, x_range, partials=partials),
+            'find_all_roots per step': lambda f: _cold_grid(f, params, x_range),
+            'fsolve per step, 7 guesses': lambda f: _cold_fsolve(f, params, guesses),
+        }
+        branches = None
+        for method, solve in methods.items():
+            best = np.inf
+            for _ in range(repeat):
+                counter = CountingFunction(family)
+                start = time.perf_counter()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    output = solve(counter)
+                best = min(best, time.perf_counter() - start)
+            iterations = None
+            if method == 'track_roots':
+                branches = output
+                iterations = int(output.iterations.sum())
+            elif method == 'find_all_roots per step':
+                found = [np.sort(column[~np.isnan(column)]) for column in branches.roots.T]
+                agree = all(len(a) == len(b) and np.allclose(a, b, atol=1e-8) for a, b in zip(found, output))
+                print(f"{name:14s} track_roots matches find_all_roots at every step: {agree}")
+            results.append({'family': name, 'method': method, 'calls': counter.calls, 'points': counter.points,
+                            'iterations': iterations, 'seconds_per_step': best / steps})
+            per_step = '' if iterations is None else f"iterations/step={iterations / steps:7.2f}"
+            print(f"{name:14s} {method:28s} calls/step={counter.calls / steps:7.2f} "
+                  f"points/step={counter.points / steps:8.1f} time/step={best / steps * 1e6:9.1f} us {per_step}")
+        print(f"{name:14s} {len(branches.roots)} branches, {len(branches.folds)} folds")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,63 @@
+"""Compares root finding in hw4b with and without exact derivatives.
+
+Reports the number of equation evaluations (calls and points) and the wall time per solved root for
+fsolve and for the vectorized find_roots, each with a finite-difference and an exact derivative.
+    python -m benchmarks.bench_derivatives
+"""
+import time
+import warnings
+
+import numpy as np
+from scipy.optimize import fsolve
+
+import hw4b
+from benchmarks.common import CountingFunction
+
+
+def _fsolve_roots(equation, guesses, fprime):
+    roots = []
+    for guess in guesses:
+        root = fsolve(equation, guess, fprime=fprime)
+        if abs(equation(root)[0]) <= 1e-6:
+            roots.append(root[0])
+    return roots
+
+
+def run(guesses=np.linspace(-15, 15, 500), repeat=3):
+    """Runs every method on both equations and prints one line per method.
+    Args:
+        guesses: The starting points handed to every method.
+        repeat: The number of timed repetitions; the best one is reported.
+    Returns:
+        list: One dict per (equation, method) with the measured counts and timings.
+    """
+    results = []
+    # fsolve warns about guesses that stall; they are simply not counted as solved
+    warnings.simplefilter('ignore', RuntimeWarning)
+    for name, equation in (('equation1', hw4b.equation1), ('equation2', hw4b.equation2)):
+        derivative = hw4b.derivative_of(equation)
+        methods = {
+            'fsolve, estimated jacobian': lambda f: _fsolve_roots(f, guesses, None),
+            'fsolve, exact jacobian': lambda f: _fsolve_roots(f, guesses, hw4b._jacobian(derivative)),
+            'find_roots, central difference': lambda f: hw4b.find_roots(
+                f, guesses, fprime=lambda x: hw4b._numerical_derivative(f, x), unique=False)[0],
+            'find_roots, exact derivative': lambda f: hw4b.find_roots(
+                f, guesses, fprime=derivative, unique=False)[0],
+        }
+        for method, solve in methods.items():
+            best = np.inf
+            for _ in range(repeat):
+                counter = CountingFunction(equation)
+                start = time.perf_counter()
+                roots = solve(counter)
+                best = min(best, time.perf_counter() - start)
+            solved = max(int(np.count_nonzero(~np.isnan(np.asarray(roots, dtype=float)))), 1)
+            results.append({'equation': name, 'method': method, 'solved': solved, 'calls': counter.calls,
+                            'points': counter.points, 'seconds_per_root': best / solved})
+            print(f"{name:10s} {method:32s} solved={solved:4d} calls={counter.calls:6d} "
+                  f"points/root={counter.points / solved:8.1f} time/root={best / solved * 1e6:9.2f} us")
+    return results
+
+
+if __name__ == "__main__":
+    run()
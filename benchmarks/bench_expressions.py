@@ -0,0 +1,57 @@
+"""Compares equations compiled from strings by hw4b.compile_expression with the hand-written ones.
+
+Reports the cost of compiling (cold and cached) and the evaluation and root-finding time of the
+compiled equations next to equation1 and equation2.
+    python -m benchmarks.bench_expressions
+"""
+import timeit
+
+import numpy as np
+
+import hw4b
+
+CASES = (('equation1', hw4b.equation1, "x - 3*cos(x)"),
+         ('equation2', hw4b.equation2, "cos(2*x) * x^3"))
+
+
+def _best(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def run(sizes=(100, 10_000, 1_000_000)):
+    """Times compilation, evaluation at each array size and find_all_roots, printing one line per case.
+    Args:
+        sizes: The array sizes used for the evaluation timings.
+    Returns:
+        list: One dict per measurement.
+    """
+    results = []
+    for name, handwritten, expression in CASES:
+        cold = _best(lambda: (hw4b._compile_string.cache_clear(), hw4b._compile_normalized.cache_clear(),
+                              hw4b.compile_expression(expression)), 200)
+        hw4b.compile_expression(expression)
+        cached = _best(lambda: hw4b.compile_expression(expression), 10_000)
+        results.append({'equation': name, 'compile_seconds': cold, 'cached_compile_seconds': cached})
+        print(f"{name}: compile {cold * 1e6:8.2f} us, cached lookup {cached * 1e6:6.3f} us")
+
+        compiled = hw4b.compile_expression(expression)
+        for size in sizes:
+            x = np.linspace(-15, 15, size)
+            assert np.allclose(compiled(x), handwritten(x))
+            number = max(1, 100_000 // size)
+            t_hand = _best(lambda: handwritten(x), number)
+            t_comp = _best(lambda: compiled(x), number)
+            results.append({'equation': name, 'size': size, 'handwritten_seconds': t_hand,
+                            'compiled_seconds': t_comp})
+            print(f"  n={size:>9,d}  hand-written {t_hand * 1e6:10.2f} us  compiled {t_comp * 1e6:10.2f} us"
+                  f"  ratio {t_comp / t_hand:5.2f}")
+
+        t_hand = _best(lambda: hw4b.find_all_roots(handwritten), 20)
+        t_comp = _best(lambda: hw4b.find_all_roots(compiled), 20)
+        results.append({'equation': name, 'find_all_roots_handwritten': t_hand, 'find_all_roots_compiled': t_comp})
+        print(f"  find_all_roots  hand-written {t_hand * 1e3:8.3f} ms  compiled {t_comp * 1e3:8.3f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    run()
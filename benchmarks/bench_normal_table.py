@@ -0,0 +1,68 @@
+"""Compares hw4a.StandardNormalTable with direct SciPy evaluation for 1e3 to 1e8 N(mean, std) queries.
+
+Three ways of evaluating the CDF and pdf are timed: a frozen stats.norm object (what hw4a's plotting
+functions use), scipy.special.ndtr on standardized values, and the table. Queries are processed in
+chunks of CHUNK values so 1e8 queries do not need 800 MB arrays; per-call overhead therefore shows
+up in full at the small sizes.
+    python -m benchmarks.bench_normal_table [max_size]
+"""
+import sys
+import time
+
+import numpy as np
+from scipy import special, stats
+
+import hw4a
+
+CHUNK = 1_000_000
+
+
+def _timed(evaluate, x, size):
+    """Times evaluating size queries, taken chunk by chunk from x (repeated as often as needed)."""
+    start = time.perf_counter()
+    for i in range(0, size, CHUNK):
+        evaluate(x[:min(CHUNK, size - i)])
+    return time.perf_counter() - start
+
+
+def run(sizes=(10**3, 10**4, 10**5, 10**6, 10**7, 10**8), mean=175.0, std_dev=3.0):
+    """Times each method at each size and prints the time per million queries.
+    Args:
+        sizes: The numbers of queries.
+        mean: The mean of the queried distribution.
+        std_dev: The standard deviation of the queried distribution.
+    Returns:
+        list: One dict per (size, function, method) with the seconds taken.
+    """
+    table = hw4a.standard_normal_table()
+    dist = hw4a.define_distribution(mean, std_dev)
+    rng = np.random.default_rng(0)
+    x = rng.normal(mean, std_dev, size=min(max(sizes), CHUNK))
+    error = np.abs(table.cdf(x, mean, std_dev) - special.ndtr((x - mean) / std_dev)).max()
+    print(f"table: {len(table._c0)} cells, guaranteed error {table.error_bound:.2e}, observed {error:.2e}")
+
+    methods = {
+        'cdf': {'frozen stats.norm': dist.cdf,
+                'special.ndtr': lambda v: special.ndtr((v - mean) / std_dev),
+                'table': lambda v: table.cdf(v, mean, std_dev)},
+        'pdf': {'frozen stats.norm': dist.pdf,
+                'stats.norm.pdf': lambda v: stats.norm.pdf(v, mean, std_dev),
+                'table': lambda v: table.pdf(v, mean, std_dev)},
+    }
+    results = []
+    for size in sizes:
+        # Larger sizes reuse the same chunk of queries over and over, so memory stays at one chunk
+        repeat = max(1, 10**5 // size)
+        for function, variants in methods.items():
+            line = f"n={size:>11,d} {function}:"
+            for name, evaluate in variants.items():
+                seconds = min(_timed(evaluate, x, size) for _ in range(repeat if size < 10**7 else 1))
+                results.append({'size': size, 'function': function, 'method': name, 'seconds': seconds})
+                line += f"  {name} {seconds / size * 1e6 * 1e3:9.2f} ms/M"
+            print(line)
+    return results
+
+
+if __name__ == "__main__":
+    run(tuple(s for s in (10**3, 10**4, 10**5, 10**6, 10**7, 10**8) if s <= float(sys.argv[1]))
+        if len(sys.argv) > 1 else (10**3, 10**4, 10**5, 10**6, 10**7, 10**8))
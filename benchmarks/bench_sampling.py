@@ -0,0 +1,71 @@
+"""Compares sampling.adaptive_sample with uniform linspace grids.
+
+For each curve the adaptive sampler is run at a few tolerances. The worst error of drawing the curve
+as straight lines between the samples is measured against a dense reference, and the benchmark
+finds the smallest uniform grid with the same worst error. Fewer evaluations for the same error
+is the win. The hw4b equations also check that root bracketing on the adaptive samples finds the
+same roots as the 200-point grid.
+    python -m benchmarks.bench_sampling
+"""
+import numpy as np
+
+import hw4a
+import hw4b
+from benchmarks.common import CountingFunction
+from sampling import adaptive_sample
+
+CURVES = (
+    ('N(175, 3) pdf', hw4a.define_distribution(175, 3).pdf, 160, 190),
+    ('N(0, 1) pdf', hw4a.define_distribution(0, 1).pdf, -6, 6),
+    ('x - 3cos(x)', hw4b.equation1, -15, 15),
+    ('cos(2x) x^3', hw4b.equation2, -15, 15),
+)
+
+
+def _line_error(func, x, y, reference):
+    return np.abs(np.interp(reference, x, y) - func(reference)).max()
+
+
+def _uniform_points_for(func, start, stop, error, reference):
+    """Finds the smallest linspace grid whose worst line error is at most error, by bisection."""
+    low, high = 2, 4
+    while _line_error(func, *(lambda g: (g, func(g)))(np.linspace(start, stop, high)), reference) > error:
+        low, high = high, high * 2
+    while high - low > 1:
+        mid = (low + high) // 2
+        grid = np.linspace(start, stop, mid)
+        if _line_error(func, grid, func(grid), reference) > error:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def run(rel_tols=(1e-2, 1e-3, 1e-4)):
+    """Prints the evaluations the adaptive sampler and a uniform grid need for the same worst error.
+    Args:
+        rel_tols: The tolerances, relative to the curve's range, to run the adaptive sampler at.
+    Returns:
+        list: One dict per (curve, tolerance).
+    """
+    results = []
+    for name, func, start, stop in CURVES:
+        reference = np.linspace(start, stop, 1_000_001)
+        for rel_tol in rel_tols:
+            counter = CountingFunction(func)
+            x, y = adaptive_sample(counter, start, stop, rel_tol=rel_tol)
+            error = _line_error(func, x, y, reference)
+            uniform = _uniform_points_for(func, start, stop, error, reference)
+            results.append({'curve': name, 'rel_tol': rel_tol, 'adaptive_evaluations': counter.points,
+                            'uniform_points': uniform, 'error': float(error)})
+            print(f"{name:14s} rel_tol={rel_tol:.0e}  adaptive {counter.points:6d} evaluations"
+                  f"  uniform {uniform:6d} points  ({uniform / counter.points:4.2f}x)  worst error {error:.2e}")
+        if func in (hw4b.equation1, hw4b.equation2):
+            x, y = adaptive_sample(func, start, stop)
+            same = np.allclose(hw4b.find_all_roots(func, x=x, y=y), hw4b.find_all_roots(func, start, stop))
+            print(f"{name:14s} roots from adaptive samples match the 200-point grid: {same}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
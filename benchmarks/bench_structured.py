@@ -0,0 +1,91 @@
+"""Times hw4c.solve_structured on structured systems from 10 to 100,000 unknowns.
+
+Each structure is timed next to the general dense scipy.linalg.solve while the dense matrix still
+fits comfortably in memory (n <= DENSE_LIMIT); above that only the structured path is timed, with
+banded and sparse systems passed as sparse matrices.
+    python -m benchmarks.bench_structured
+"""
+import time
+
+import numpy as np
+from scipy import linalg, sparse
+
+import hw4c
+
+DENSE_LIMIT = 2000
+
+
+def _tridiagonal(n, rng):
+    return sparse.diags([rng.uniform(-1, 1, n - 1), rng.uniform(4, 5, n), rng.uniform(-1, 1, n - 1)], [-1, 0, 1])
+
+
+def _grid_operator(n, convection):
+    """A 5-point finite-difference operator on a square grid with about n unknowns."""
+    m = max(int(round(np.sqrt(n))), 2)
+    one_d = sparse.diags([-1 - convection, 2.0, -1 + convection], [-1, 0, 1], shape=(m, m))
+    eye = sparse.eye(m)
+    return (sparse.kron(eye, one_d) + sparse.kron(one_d, eye) + 0.1 * sparse.eye(m * m)).tocsr()
+
+
+def _sparse_spd(n, rng):
+    return _grid_operator(n, 0.0)
+
+
+def _sparse_general(n, rng):
+    return _grid_operator(n, 0.3)
+
+
+# name -> (builder, largest n to run); builders return a dense array or a sparse matrix
+CASES = {
+    'diagonal': (lambda n, rng: sparse.diags(rng.uniform(1, 2, n)), 100_000),
+    'tridiagonal': (_tridiagonal, 100_000),
+    'lower-triangular': (lambda n, rng: np.tril(rng.normal(size=(n, n))) + n * np.eye(n), DENSE_LIMIT),
+    'symmetric positive definite': (lambda n, rng: (lambda G: G @ G.T + n * np.eye(n))(rng.normal(size=(n, n))),
+                                    DENSE_LIMIT),
+    'sparse symmetric positive definite': (_sparse_spd, 100_000),
+    'sparse general': (_sparse_general, 100_000),
+}
+
+
+def _time(func, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes=(10, 100, 1000, 10_000, 100_000)):
+    """Runs every case at every size it supports and prints the path taken and the timings.
+    Args:
+        sizes: The numbers of unknowns to run.
+    Returns:
+        list: One dict per (case, size) with the path, timings and residual.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for name, (build, limit) in CASES.items():
+        for n in sizes:
+            if n > limit:
+                continue
+            A = build(n, rng)
+            n = A.shape[0]  # The grid cases round n to a square
+            if sparse.issparse(A) and n <= DENSE_LIMIT // 2:
+                A = A.toarray()  # Small systems arrive dense, as they would from the interactive loop
+            b = rng.normal(size=n)
+            seconds, (x, path) = _time(lambda: hw4c.solve_structured(A, b))
+            residual = float(np.abs(A @ x - b).max())
+            row = {'case': name, 'n': n, 'path': path, 'seconds': seconds, 'residual': residual}
+            line = f"{name:36s} n={n:>7,d} path={path:13s} {seconds * 1e3:10.3f} ms"
+            if n <= DENSE_LIMIT:
+                dense = A.toarray() if sparse.issparse(A) else A
+                row['dense_seconds'], _ = _time(lambda: linalg.solve(dense, b))
+                line += f"   dense solve {row['dense_seconds'] * 1e3:10.3f} ms"
+            results.append(row)
+            print(line + f"   residual {residual:.1e}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
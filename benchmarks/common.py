@@ -0,0 +1,17 @@
+"""Helpers shared by the benchmark modules."""
+import numpy as np
+
+
+class CountingFunction:
+    """Wraps a function and counts how often it is called and on how many points in total.
+    Extra arguments, such as the parameter of an equation family, are passed through."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.points = 0
+
+    def __call__(self, x, *args):
+        self.calls += 1
+        self.points += np.size(x)
+        return self.func(x, *args)
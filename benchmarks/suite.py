@@ -0,0 +1,245 @@
+"""The unified benchmark suite for hw4a, hw4b and hw4c.
+
+Every workload is run at a range of sizes and measured for wall time (best of several repeats),
+equation evaluations (calls and points), peak traced memory and throughput. The results are written
+to JSON and can be compared against a stored baseline; any workload whose time grew by more than the
+threshold is reported as a regression and the run exits with status 1.
+    python -m benchmarks [--quick] [--output FILE] [--baseline FILE] [--save-baseline FILE]
+                         [--threshold 0.25] [--repeat 3] [--profile]
+
+--profile sets HW4_PROFILE=1 before the hw4 modules are imported, so the @profiled() hooks in the
+solver functions are active and their call counts and times are added to the output.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+from benchmarks.common import CountingFunction
+
+SIZES = {
+    'distribution': (10**2, 10**3, 10**4, 10**5, 10**6),
+    'roots': (1, 10, 100, 1000),
+    'linear': (2, 10, 50, 100, 500, 1000, 2000, 5000),
+}
+QUICK_SIZES = {
+    'distribution': (10**2, 10**4),
+    'roots': (1, 10, 100),
+    'linear': (2, 10, 100, 500),
+}
+
+
+def _distribution_workloads(size):
+    import hw4a
+
+    rng = np.random.default_rng(size)
+    x = rng.normal(175, 3, size=size)
+    dist = hw4a.define_distribution(175, 3)
+    return {
+        'calculate_probability': lambda: hw4a.calculate_probability(dist, x),
+        'normal_tail_probability': lambda: hw4a.normal_tail_probability(175, 3, x, 'right'),
+    }
+
+
+def _root_workloads(size):
+    import hw4b
+
+    guesses = np.linspace(-15, 15, size)
+    # find_root and find_intersection solve one guess per call, so they get at most 100 guesses
+    few = guesses if size <= 100 else np.linspace(-15, 15, 100)
+    return {
+        'find_roots': lambda counter: hw4b.find_roots(counter, guesses),
+        'find_root': lambda counter: [hw4b.find_root(counter, guess) for guess in few],
+        'find_intersection': lambda counter: [hw4b.find_intersection(guess, counter, hw4b.equation2)
+                                              for guess in few],
+    }
+
+
+def _linear_workloads(size):
+    import hw4c
+    from scipy.linalg import solve
+
+    rng = np.random.default_rng(size)
+    # Diagonally dominant, so every size is well conditioned and solves the same way each repeat
+    A = rng.standard_normal((size, size)) + size * np.eye(size)
+    b = rng.standard_normal(size)
+    system = np.column_stack((A, b))[np.newaxis]
+    return {
+        'scipy.linalg.solve': lambda: solve(A, b),
+        'solve_batch': lambda: hw4c.solve_batch(system),
+        'solve_refined': lambda: hw4c.solve_refined(A, b),
+    }
+
+
+@contextlib.contextmanager
+def _counting(counted):
+    """Yields a CountingFunction around counted, or None if counted is None. While it is in use the
+    solvers differentiate it with counted's own derivative, so only evaluations of the equation itself
+    are timed and counted; the registration is removed afterwards, so hw4b is left as it was."""
+    if counted is None:
+        yield None
+        return
+    import hw4b
+
+    counter = CountingFunction(counted)
+    hw4b.register_derivative(counter, hw4b.derivative_of(counted))
+    try:
+        yield counter
+    finally:
+        del hw4b._DERIVATIVES[counter]
+
+
+def _measure(run, repeat, counted=None):
+    """Runs a workload repeat times and returns its best wall time, then once more under tracemalloc
+    for the peak memory. If counted is given, run is passed a fresh CountingFunction around it on
+    every call (see _counting) and the evaluation counts of one run are reported."""
+    calls = points = None
+    seconds = []
+    with warnings.catch_warnings():
+        # fsolve warns about guesses that do not converge; those are part of the workload
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for _ in range(repeat):
+            with _counting(counted) as counter:
+                args = () if counter is None else (counter,)
+                start = time.perf_counter()
+                run(*args)
+                seconds.append(time.perf_counter() - start)
+                if counter is not None:
+                    calls, points = counter.calls, counter.points
+        with _counting(counted) as counter:
+            tracemalloc.start()
+            try:
+                run(*(() if counter is None else (counter,)))
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    return {
+        'seconds': min(seconds),
+        'calls': calls,
+        'points': points,
+        'peak_bytes': peak,
+    }
+
+
+def run(sizes=None, repeat=3, log=print):
+    """Runs every workload at every size.
+    Args:
+        sizes: {'distribution': sizes, 'roots': sizes, 'linear': sizes}; SIZES by default.
+        repeat: The number of timed repeats per measurement; the fastest is reported.
+        log: Called with one formatted line per measurement, or None for no output.
+    Returns:
+        list: One dict per measurement with 'group', 'workload', 'size', 'seconds', 'calls',
+        'points', 'peak_bytes' and 'throughput' (queries, guesses or systems per second).
+    """
+    import hw4b
+
+    sizes = sizes or SIZES
+    factories = {
+        'distribution': (_distribution_workloads, None),
+        'roots': (_root_workloads, hw4b.equation1),
+        'linear': (_linear_workloads, None),
+    }
+    results = []
+    for group, (factory, counted) in factories.items():
+        for size in sizes.get(group, ()):
+            for name, workload in factory(size).items():
+                result = {'group': group, 'workload': name, 'size': size}
+                result.update(_measure(workload, repeat, counted))
+                # Linear workloads solve one system; the others process size queries or guesses
+                items = 1 if group == 'linear' else size
+                if group == 'roots' and name != 'find_roots':
+                    items = min(size, 100)
+                result['throughput'] = items / result['seconds'] if result['seconds'] > 0 else float('inf')
+                results.append(result)
+                if log:
+                    calls = '' if result['calls'] is None else f"{result['calls']:6d} calls {result['points']:9d} points"
+                    log(f"{group:12s} {name:24s} {size:>8d} {result['seconds'] * 1e3:10.3f} ms "
+                        f"{result['peak_bytes'] / 2**20:9.2f} MiB {result['throughput']:12.4g}/s  {calls}")
+    return results
+
+
+def _key(result):
+    return f"{result['group']}/{result['workload']}/{result['size']}"
+
+
+def compare(results, baseline, threshold=0.25):
+    """Compares results with a baseline run.
+    Args:
+        results: The measurements from run().
+        baseline: The measurements of an earlier run, as stored in its JSON 'results'.
+        threshold: The relative slowdown above which a measurement counts as a regression.
+    Returns:
+        list: One dict per measurement present in both runs whose time grew by more than the
+        threshold, with its 'key', 'baseline' and 'current' seconds and the 'ratio'.
+    """
+    previous = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None or old['seconds'] <= 0:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        if ratio > 1 + threshold:
+            regressions.append({'key': _key(result), 'baseline': old['seconds'], 'current': result['seconds'],
+                                'ratio': ratio})
+    return regressions
+
+
+def _write(path, document):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="run the smaller QUICK_SIZES only")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the results")
+    parser.add_argument('--baseline', help="a results file to compare against")
+    parser.add_argument('--save-baseline', help="also write the results to this file as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="relative slowdown reported as a regression (default 0.25)")
+    parser.add_argument('--profile', action='store_true', help="enable the @profiled() hooks in the solvers")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        if any(name in sys.modules for name in ('hw4a', 'hw4b', 'hw4c')):
+            parser.error("--profile must be set before the hw4 modules are imported")
+        os.environ['HW4_PROFILE'] = '1'
+    import profiling
+
+    results = run(QUICK_SIZES if args.quick else SIZES, args.repeat)
+    document = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'quick': args.quick,
+        'results': results,
+    }
+    if profiling.ENABLED:
+        document['profile'] = profiling.stats()
+        for name, entry in document['profile'].items():
+            print(f"{name:45s} {entry['calls']:8d} calls {entry['seconds']:10.4f} s")
+    _write(args.output, document)
+    if args.save_baseline:
+        _write(args.save_baseline, document)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['key']}: {regression['baseline'] * 1e3:.3f} ms -> "
+                  f"{regression['current'] * 1e3:.3f} ms ({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
+    return 0
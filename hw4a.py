@@ -1,7 +1,13 @@
 #ChatGPT was used to help write this code
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
 import numpy as np
-from scipy import stats
-import matplotlib.pyplot as plt
+from scipy import special, stats
+
+from profiling import profiled
+from sampling import adaptive_sample
 
 
 def define_distribution(mean, std_dev):
@@ -20,6 +26,7 @@ def define_distribution(mean, std_dev):
     return dist
 
 
+@profiled()
 def calculate_probability(dist, x_value):
     '''
     Calculates the probability that a random variable is less than
@@ -37,15 +44,372 @@ def calculate_probability(dist, x_value):
     return prob
 
 
-def generate_data(start, end):
+@profiled()
+def normal_tail_probability(mean, std_dev, x_value, tail='left', upper=None, log=False):
+    '''
+    Calculates normal-distribution probabilities for many queries at once, without building frozen
+    distributions. mean, std_dev, x_value, tail and upper are broadcast against each other, so one call
+    can cover millions of (mean, std_dev, x, tail) combinations.
+
+    Each tail is computed directly from the standard normal CDF (scipy.special.ndtr) on the side that
+    keeps its precision: the right tail uses ndtr(-z) instead of 1 - ndtr(z), which would round to 0
+    beyond about 8 standard deviations. With log=True the log-probability is returned using
+    scipy.special.log_ndtr, which stays finite far past the point where the probability underflows.
+    :param mean: The mean(s) of the distributions.
+    :param std_dev: The standard deviation(s) of the distributions.
+    :param x_value: The x-value(s); the lower bound for 'interval'.
+    :param tail: 'left' for P(X<=x), 'right' for P(X>x), 'two-sided' for P(|X-mean|>=|x-mean|) or
+        'interval' for P(x<X<=upper). Either one string or an array of them.
+    :param upper: The upper bound(s), needed where tail is 'interval'.
+    :param log: If True, return the natural log of the probabilities.
+    :return: An array of probabilities (or log-probabilities) with the broadcast shape of the inputs.
+    '''
+    z = (np.asarray(x_value, dtype=float) - mean) / std_dev
+    z_upper = None if upper is None else (np.asarray(upper, dtype=float) - mean) / std_dev
+    tail = np.asarray(tail)
+
+    def tail_of(name):
+        if name == 'left':
+            return special.log_ndtr(z) if log else special.ndtr(z)
+        if name == 'right':
+            return special.log_ndtr(-z) if log else special.ndtr(-z)
+        if name == 'two-sided':
+            return np.log(2) + special.log_ndtr(-np.abs(z)) if log else 2 * special.ndtr(-np.abs(z))
+        if name == 'interval':
+            if z_upper is None:
+                raise ValueError("upper is required for tail='interval'")
+            # Take the difference on the side of the mean where the CDF values are small and exact
+            right = z > 0
+            a = np.where(right, -z, z_upper)
+            b = np.where(right, -z_upper, z)
+            log_a, log_b = special.log_ndtr(a), special.log_ndtr(b)
+            with np.errstate(divide='ignore'):
+                log_p = log_a + np.log1p(-np.exp(np.minimum(log_b - log_a, 0)))
+            return log_p if log else np.exp(log_p)
+        raise ValueError(f"unknown tail {name!r}, expected 'left', 'right', 'two-sided' or 'interval'")
+
+    if tail.ndim == 0:
+        return tail_of(str(tail))
+    names = np.unique(tail)
+    return np.select([tail == name for name in names], [tail_of(str(name)) for name in names])
+
+
+class StandardNormalTable:
+    '''
+    A precomputed table of the standard normal CDF that answers N(mean, std_dev) queries by
+    standardizing them, z = (x - mean) / std_dev.
+
+    Inside [-tail, tail] the CDF is a piecewise cubic Hermite interpolant through exact values and
+    slopes (the pdf) on an evenly spaced z-grid. The cubic error on a cell of width h is at most
+    h**4 / 384 times the largest fourth derivative of the CDF, which is 0.55059 (at z = sqrt(3 - sqrt(6))),
+    so the grid spacing is chosen from the tolerance and the bound holds everywhere in the table. Lookups
+    cost an index computation and a Horner step, with no per-call object overhead.
+    Outside [-tail, tail] the values are tiny and the absolute bound would mean little relative
+    accuracy, so those points fall back to exact evaluation with scipy.special.ndtr.
+    The pdf is always evaluated in closed form, since one exp is cheaper than a table lookup.
+    '''
+    # max |d^4/dz^4 CDF(z)|, reached at z = sqrt(3 - sqrt(6))
+    _MAX_FOURTH_DERIVATIVE = 0.5505878395008195
+
+    def __init__(self, tolerance=1e-10, tail=5.0):
+        '''
+        Builds the table.
+        :param tolerance: The guaranteed maximum absolute CDF error inside the table.
+        :param tail: The table covers z in [-tail, tail]; queries outside it are evaluated exactly.
+        '''
+        self.tail = tail
+        cells = int(np.ceil(2 * tail / (384 * tolerance / self._MAX_FOURTH_DERIVATIVE) ** 0.25))
+        self.step = 2 * tail / cells
+        self.error_bound = self._MAX_FOURTH_DERIVATIVE * self.step ** 4 / 384
+        z = np.linspace(-tail, tail, cells + 1)
+        value, slope = special.ndtr(z), self._standard_pdf(z) * self.step
+        # Cubic Hermite coefficients of each cell in the local coordinate s in [0, 1]
+        v0, v1, d0, d1 = value[:-1], value[1:], slope[:-1], slope[1:]
+        self._c0 = v0
+        self._c1 = d0
+        self._c2 = 3 * (v1 - v0) - 2 * d0 - d1
+        self._c3 = 2 * (v0 - v1) + d0 + d1
+
+    @staticmethod
+    def _standard_pdf(z):
+        return np.exp(-0.5 * z * z) * 0.3989422804014327  # 1 / sqrt(2 pi)
+
+    def cdf(self, x, mean=0.0, std_dev=1.0):
+        '''
+        Evaluates the CDF of N(mean, std_dev) at x.
+        :param x: The x-value(s).
+        :param mean: The mean(s) of the distribution.
+        :param std_dev: The standard deviation(s) of the distribution.
+        :return: An array of P(X <= x), within error_bound of the exact values.
+        '''
+        z = np.asarray((np.asarray(x, dtype=float) - mean) / std_dev, dtype=float)
+        scalar = z.ndim == 0
+        z = np.atleast_1d(z)
+        t = (np.clip(z, -self.tail, self.tail) + self.tail) / self.step
+        with np.errstate(invalid='ignore'):
+            i = np.minimum(t.astype(np.intp), len(self._c0) - 1)
+        s = t - i
+        # mode='clip' keeps the meaningless index of a NaN z in range; that point is overwritten below
+        result = self._c3.take(i, mode='clip')
+        result *= s
+        result += self._c2.take(i, mode='clip')
+        result *= s
+        result += self._c1.take(i, mode='clip')
+        result *= s
+        result += self._c0.take(i, mode='clip')
+        # NaN z takes the exact path too, so it comes out as nan like ndtr's
+        outside = ~(np.abs(z) <= self.tail)
+        if outside.any():
+            result[outside] = special.ndtr(z[outside])
+        return result[0] if scalar else result
+
+    def pdf(self, x, mean=0.0, std_dev=1.0):
+        '''
+        Evaluates the pdf of N(mean, std_dev) at x.
+        :param x: The x-value(s).
+        :param mean: The mean(s) of the distribution.
+        :param std_dev: The standard deviation(s) of the distribution.
+        :return: An array of pdf values.
+        '''
+        return self._standard_pdf((np.asarray(x, dtype=float) - mean) / std_dev) / std_dev
+
+
+@lru_cache(maxsize=None)
+def standard_normal_table(tolerance=1e-10, tail=5.0):
+    '''
+    Returns the shared StandardNormalTable for the given settings, building it on first use.
+    :param tolerance: The guaranteed maximum absolute CDF error inside the table.
+    :param tail: The half-width of the table in standard deviations.
+    :return: The StandardNormalTable.
+    '''
+    return StandardNormalTable(tolerance, tail)
+
+
+class MixtureDistribution:
+    '''
+    A finite mixture of distributions, e.g. of normal distributions made with define_distribution. A
+    draw picks component i with probability weights[i] and then draws from that component.
+
+    It provides the parts of the frozen scipy.stats interface that calculate_probability and
+    estimate_tail_probability use (cdf, sf, pdf, logpdf, mean and rvs), plus from_uniform, which maps
+    points of the unit square to draws for quasi-Monte Carlo sampling.
+    '''
+    # The number of uniform coordinates from_uniform needs per draw: one picks the component, one draws from it
+    dimension = 2
+
+    def __init__(self, weights, components):
+        '''
+        :param weights: One non-negative weight per component; they are normalized to sum to 1.
+        :param components: The component distributions, frozen scipy.stats distributions or mixtures.
+        '''
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim != 1 or len(weights) != len(components) or np.any(weights < 0) or not weights.sum() > 0:
+            raise ValueError("weights must be one non-negative weight per component, with a positive sum")
+        self.weights = weights / weights.sum()
+        self.components = list(components)
+        self._edges = np.cumsum(self.weights)
+        self._edges[-1] = 1.0
+
+    def cdf(self, x):
+        return sum(w * c.cdf(x) for w, c in zip(self.weights, self.components))
+
+    def sf(self, x):
+        return sum(w * c.sf(x) for w, c in zip(self.weights, self.components))
+
+    def pdf(self, x):
+        return sum(w * c.pdf(x) for w, c in zip(self.weights, self.components))
+
+    def logpdf(self, x):
+        with np.errstate(divide='ignore'):
+            terms = [np.log(w) + c.logpdf(x) for w, c in zip(self.weights, self.components)]
+        return special.logsumexp(terms, axis=0)
+
+    def mean(self):
+        return sum(w * c.mean() for w, c in zip(self.weights, self.components))
+
+    def rvs(self, size=1, random_state=None):
+        '''
+        Draws random values from the mixture.
+        :param size: The number of values.
+        :param random_state: A numpy Generator, or a seed for one.
+        :return: An array of size draws.
+        '''
+        rng = np.random.default_rng(random_state)
+        which = rng.choice(len(self.components), size=size, p=self.weights)
+        x = np.empty(size)
+        for i, component in enumerate(self.components):
+            chosen = which == i
+            x[chosen] = component.rvs(size=int(chosen.sum()), random_state=rng)
+        return x
+
+    def from_uniform(self, u):
+        '''
+        Maps points u of the unit square to draws: u[:, 0] picks the component by its weight and
+        u[:, 1] is passed through that component's inverse CDF (ppf).
+        :param u: An (n, 2) array of points in [0, 1).
+        :return: An array of n draws.
+        '''
+        which = np.minimum(np.searchsorted(self._edges, u[:, 0], side='right'), len(self.components) - 1)
+        x = np.empty(len(u))
+        for i, component in enumerate(self.components):
+            chosen = which == i
+            x[chosen] = component.ppf(u[chosen, 1])
+        return x
+
+
+def define_mixture(weights, components):
+    '''
+    Creates a mixture of distributions, the counterpart of define_distribution for populations made of
+    several groups, e.g. define_mixture([0.7, 0.3], [define_distribution(165, 3), define_distribution(178, 4)]).
+    :param weights: The share of each component; normalized to sum to 1.
+    :param components: The component distributions.
+    :return: The MixtureDistribution.
+    '''
+    return MixtureDistribution(weights, components)
+
+
+# The result of estimate_tail_probability: the estimate, its confidence interval and the samples drawn
+TailEstimate = namedtuple('TailEstimate', ['probability', 'ci_low', 'ci_high', 'samples', 'method'])
+
+# The fewest chunk estimates the spread of a 'qmc' estimate is taken from
+_MIN_QMC_CHUNKS = 8
+
+
+def _draw(dist, size, method, rng):
+    if method == 'mc':
+        return np.asarray(dist.rvs(size=size, random_state=rng), dtype=float)
+    # Scrambled Sobol points, in a power-of-two count as the sequence's balance properties require
+    u = stats.qmc.Sobol(d=getattr(dist, 'dimension', 1), rng=rng).random_base2(int(np.ceil(np.log2(size))))
+    # Keep the points off 0, where the inverse CDF is -inf
+    u = np.maximum(u, np.finfo(float).tiny)
+    if hasattr(dist, 'from_uniform'):
+        return dist.from_uniform(u)
+    return dist.ppf(u[:, 0])
+
+
+def _tail_chunk(dist, x_value, tail, size, method, seed, shift):
+    '''
+    Draws one chunk of samples with its own seed; run in a worker process by estimate_tail_probability.
+    :return: The number of samples and the sums of the tail indicator times the importance weight, and
+        of its square.
+    '''
+    x = _draw(dist, size, method, np.random.default_rng(seed))
+    if shift:
+        x = x + shift
+    hit = x > x_value if tail == 'right' else x <= x_value
+    x = x[hit]
+    # Importance weight: the density of the distribution over the density of the shifted proposal
+    weight = np.exp(dist.logpdf(x) - dist.logpdf(x - shift)) if shift else np.ones(len(x))
+    return len(hit), weight.sum(), np.dot(weight, weight)
+
+
+@profiled()
+def estimate_tail_probability(dist, x_value, tail='right', ci_width=1e-3, rel_width=None, confidence=0.95,
+                              method='mc', chunk_size=2**16, max_samples=10**8, seed=None, workers=1, shift=None):
+    '''
+    Estimates P(X>x_value) or P(X<=x_value) by sampling, for distributions with no closed-form tail
+    such as mixtures. Any distribution with rvs (and ppf or from_uniform for method='qmc') works, so
+    this also takes distributions from define_distribution, where calculate_probability gives the exact answer.
+
+    Samples are drawn in chunks of chunk_size, and every chunk only adds to running sums, so memory
+    stays constant however many samples are needed. Sampling stops as soon as the confidence interval
+    is narrower than ci_width (or rel_width times the estimate). Each chunk gets its own stream from
+    numpy.random.SeedSequence(seed).spawn, so chunks can be drawn in parallel processes and the
+    result for a seed does not depend on which process drew which chunk.
+
+    With method='mc' the interval comes from the variance of the individual samples. With
+    method='qmc' every chunk is an independently scrambled Sobol sequence, which usually gives a far
+    more accurate chunk estimate, and the interval comes from the spread between the chunk
+    estimates (Student t, at least eight chunks). Sobol points are stratified, so chunks can count
+    exactly the same number of tail samples; without importance weights the interval is therefore
+    never narrower than one sample in the total count.
+
+    For far tails like P(X > mean + 6 std_dev) almost no plain samples land in the tail. With shift,
+    samples are drawn from the distribution moved by shift and each one in the tail is weighted by
+    pdf(x) / pdf(x - shift) (importance sampling); shift='auto' moves the mean onto x_value.
+    :param dist: The distribution, e.g. from define_distribution or define_mixture.
+    :param x_value: The boundary of the tail.
+    :param tail: 'right' for P(X>x_value) or 'left' for P(X<=x_value).
+    :param ci_width: Stop once the confidence interval is at most this wide.
+    :param rel_width: Optional. Also stop once the interval is at most this fraction of the estimate.
+    :param confidence: The confidence level of the interval.
+    :param method: 'mc' for pseudo-random sampling or 'qmc' for scrambled Sobol sampling.
+    :param chunk_size: The number of samples per chunk (rounded up to a power of two for 'qmc').
+    :param max_samples: Stop after about this many samples even if the interval is still too wide.
+    :param seed: The seed of the sample streams, for reproducible estimates.
+    :param workers: The number of processes drawing chunks in parallel; with 1 everything runs here.
+    :param shift: Optional. A location shift for importance sampling, or 'auto'.
+    :return: A TailEstimate with the probability, the interval bounds, the number of samples and the method.
+    '''
+    if tail not in ('left', 'right'):
+        raise ValueError(f"unknown tail {tail!r}, expected 'left' or 'right'")
+    if method not in ('mc', 'qmc'):
+        raise ValueError(f"unknown method {method!r}, expected 'mc' or 'qmc'")
+    if shift == 'auto':
+        shift = x_value - dist.mean()
+    seeds = np.random.SeedSequence(seed)
+    chunk = partial(_tail_chunk, dist, x_value, tail, chunk_size, method, shift=shift)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    samples = chunks = 0
+    total = total_sq = 0.0  # Sums over the samples, for 'mc'
+    mean = m2 = 0.0  # Running mean and sum of squared deviations of the chunk estimates, for 'qmc'
+    try:
+        while True:
+            round_seeds = seeds.spawn(max(workers, 1))
+            results = pool.map(chunk, round_seeds) if pool else map(chunk, round_seeds)
+            for n, s1, s2 in results:
+                samples += n
+                chunks += 1
+                if method == 'mc':
+                    total += s1
+                    total_sq += s2
+                else:
+                    # Welford's update: the chunk estimates can agree to many digits, which a difference
+                    # of sums of squares would cancel away
+                    delta = s1 / n - mean
+                    mean += delta / chunks
+                    m2 += delta * (s1 / n - mean)
+
+            if method == 'mc':
+                probability = total / samples
+                variance = max(total_sq / samples - probability ** 2, 0.0) * samples / max(samples - 1, 1)
+                half_width = special.ndtri(0.5 + confidence / 2) * np.sqrt(variance / samples)
+            else:
+                probability = mean
+                half_width = (stats.t.ppf(0.5 + confidence / 2, chunks - 1) * np.sqrt(m2 / (chunks - 1) / chunks)
+                              if chunks > 1 else np.inf)
+                if not shift:
+                    half_width = max(half_width, 1 / samples)
+            low, high = max(probability - half_width, 0.0), min(probability + half_width, 1.0)
+            if probability == 0 and chunks > 1:
+                # No sample reached the tail: the "rule of three" bound on what could still be there
+                high = -np.log1p(-confidence) / samples
+            narrow = high - low <= ci_width or (rel_width is not None and high - low <= rel_width * probability)
+            enough = chunks >= (_MIN_QMC_CHUNKS if method == 'qmc' else 2)
+            if (enough and narrow) or samples >= max_samples:
+                return TailEstimate(probability, low, high, samples, method)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def generate_data(start, end, func=None, rel_tol=1e-3):
     '''
     This function uses the numpy linspace function to generate an array of 100 evenly spaced
     numbers between a start and end value . I chose 100 because changing it to a higher value, did not affect
     the look of the plots.
+    If a function is given (e.g. dist.pdf), the points are placed adaptively instead with
+    sampling.adaptive_sample: densely where the curve bends and sparsely on its flat tails, so the
+    plotted lines stay within about rel_tol of the plot height of the curve.
     :param start: The start of the interval range.
     :param end: The end of the interval range.
-    :return: The array of 100 evenly spaced numbers over the interval.
+    :param func: Optional. The function that will be plotted over the points.
+    :param rel_tol: The allowed plotting error as a fraction of the curve's range, used with func.
+    :return: The array of 100 evenly spaced numbers over the interval, or the adaptive points.
     '''
+    if func is not None:
+        x, _ = adaptive_sample(func, start, end, rel_tol=rel_tol)
+        return x
     x = np.linspace(start, end, 100)
     return x
 
@@ -68,21 +432,23 @@ def create_normal_dist_plot(ax, x, dist, x_value, mean, std_dev, xytext, xy):
     :param xy: The position to point the arrow annotation to on the plot
     :return: none
     '''
+    # Evaluate the pdf once, it is used for both the curve and the shading
+    y = dist.pdf(x)
     # Plot the normal distribution
-    ax.plot(x, dist.pdf(x), 'b-', lw=1, alpha=0.6, label='norm pdf')
+    ax.plot(x, y, 'b-', lw=1, alpha=0.6, label='norm pdf')
     # Check if the value is 1, for the first problem
     if x_value == 1:
         # Annotate the plot with the probability and an arrow that points at the x-value
         ax.annotate(f'P(x<{x_value}|N({mean},{std_dev}))={dist.cdf(x_value):.2f}', xy=xy, xytext=xytext, arrowprops=dict(facecolor='black', shrink=0.05),fontsize=8)
-        ax.fill_between(x, dist.pdf(x), where=(x <= x_value), color='0.5', alpha=0.3)
+        ax.fill_between(x, y, where=(x <= x_value), color='0.5', alpha=0.3)
         # Shade the area under tje curve to the left of the x_value
         ax.set_xlim(left=-6) #These are the x limits of the chart, these were chosen to match the example from the example.
         ax.set_xlim(right=6)
     else:
         # Shade the area under the curve to the right of the x_value
-        ax.fill_between(x, dist.pdf(x), where=(x >= x_value), color='0.5', alpha=0.3)
-        # Shows the probability along with an arrow pointing at the x value, 1-CDF to get the correct probability.
-        ax.annotate(f'P(x>{x_value}|N({mean},{std_dev}))={1 - dist.cdf(x_value):.2f}', xy=xy, xytext=xytext, arrowprops=dict(facecolor='black', shrink=0.05),fontsize=8)
+        ax.fill_between(x, y, where=(x >= x_value), color='0.5', alpha=0.3)
+        # Shows the probability along with an arrow pointing at the x value, the survival function (1-CDF) gives the correct probability.
+        ax.annotate(f'P(x>{x_value}|N({mean},{std_dev}))={dist.sf(x_value):.2f}', xy=xy, xytext=xytext, arrowprops=dict(facecolor='black', shrink=0.05),fontsize=8)
         ax.set_xlim(left=160) # Sets the limits to this to match the example
         ax.set_xlim(right=190)
     # Annotate the plot with the formula for the normal distribution, uses LaTex to show accurately
@@ -114,9 +480,10 @@ def create_standardized_dist_plot(ax, x, dist, x_value):
     # Draw a vertical line at the x_value
     ax.axvline(x=x_value, color='k', linestyle='-')
     # Draw a horizontal line at the CDF of the x_value
-    ax.axhline(y=dist.cdf(x_value), color='k', linestyle='-')
+    cdf_value = dist.cdf(x_value)
+    ax.axhline(y=cdf_value, color='k', linestyle='-')
     # Place a red dot at the intersection of the vertical and horizontal line
-    ax.scatter(x_value, dist.cdf(x_value), color='r')
+    ax.scatter(x_value, cdf_value, color='r')
     # Set the y-axis, uses Latex to successfully write the cdf equation
     ax.set_ylabel('$\Phi(x)=\int_{-\infty}^{x} f(x)dx$')
     # Sets the x-axis
@@ -155,6 +522,9 @@ def main():
         corresponding cdf value.
     :return:None
     '''
+    # Imported here so the other functions can be used (and rendered headless) without pyplot
+    import matplotlib.pyplot as plt
+
     # Define means and standard deviations
     mean1, std_dev1 = 0, 1
     mean2, std_dev2 = 175, 3
@@ -167,16 +537,16 @@ def main():
 
     # Calculate probabilities
     prob1 = calculate_probability(dist1, x1)
-    prob2 = 1-calculate_probability(dist2, x2)
-    # It does 1-prob to correctly get the correct probability of part 2
+    prob2 = normal_tail_probability(mean2, std_dev2, x2, tail='right')
+    # Part 2 asks for the right tail, computed directly rather than as 1-prob so it keeps its precision
 
     # Print probabilities
     print(f'Probability for distribution N({mean1},{std_dev1}) being less than 1: {prob1}')
     print(f'Probability for distribution N({mean2},{std_dev2}) being more than 181: {prob2}')
 
-    # Generate data
-    xscale = generate_data(-6, 6)
-    xscale2 = generate_data(160, 190)
+    # Generate data, placed adaptively along each pdf
+    xscale = generate_data(-6, 6, dist1.pdf)
+    xscale2 = generate_data(160, 190, dist2.pdf)
 
     # Create subplots
     fig, axs = plt.subplots(2, 2, figsize=(10, 10))
@@ -14,10 +14,30 @@
 #       You will use the plots to help make a more accurate guess, although the code is constructed
 #       to handle "bad" guesses.
 #       Recommend clearing the plots between each run, as they can build up quickly.
+#
+# Batch mode (no plots, no prompts):
+#   python hw4b.py --batch jobs.jsonl     (or --batch with no file to read stdin)
+#   Each input line is a JSON job and each output line is its JSON result, e.g.
+#     {"id": 1, "type": "root", "equation": "equation2", "interval": [-15, 15], "tolerance": 1e-6}
+#     {"id": 2, "type": "root", "equation": "equation1", "guesses": [-3, 1]}
+#     {"id": 3, "type": "intersection", "equations": ["equation1", "equation2"], "interval": [-15, 15]}
+
+import argparse
+import ast
+import json
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 
 import numpy as np
-from scipy.optimize import fsolve
-import matplotlib.pyplot as plt
+from scipy.optimize import brentq, fsolve, minimize_scalar
+
+from profiling import profiled
+from result_cache import equation_identity
+from sampling import adaptive_sample
+
 
 def equation1(x):
     """Calculates the value of the first equation for a given x.
@@ -40,28 +60,262 @@ def equation2(x):
     return np.cos(2 * x) * (x**3)
 
 
+def equation1_prime(x):
+    """Calculates the exact derivative of the first equation, 1 + 3sin(x)."""
+    return 1 + 3 * np.sin(x)
+
+
+def equation2_prime(x):
+    """Calculates the exact derivative of the second equation by the product rule,
+    3x^2 * cos(2x) - 2x^3 * sin(2x)."""
+    return 3 * x**2 * np.cos(2 * x) - 2 * x**3 * np.sin(2 * x)
+
+
+# Registry of known derivatives, looked up by derivative_of
+_DERIVATIVES = {equation1: equation1_prime, equation2: equation2_prime}
+
+
+def register_derivative(equation, derivative):
+    """Registers the exact derivative of an equation so the solvers use it instead of estimating one.
+    Args:
+        equation: The equation function.
+        derivative: A vectorized function returning the derivative of the equation.
+    """
+    _DERIVATIVES[equation] = derivative
+
+
+def _numerical_derivative(equation, x):
+    """Estimates the derivative of an equation with a central difference.
+    Args:
+        equation: A vectorized equation function.
+        x: Array of points at which to estimate the derivative.
+    Returns:
+        Array of derivative estimates, one per point in x.
+    """
+    h = 6.0554544523933395e-06 * np.maximum(1.0, np.abs(x))  # cube root of machine epsilon
+    return (equation(x + h) - equation(x - h)) / (2 * h)
+
+
+def complex_step_derivative(equation, h=1e-20):
+    """Builds the derivative of an equation by complex-step differentiation, f'(x) = Im(f(x + ih)) / h.
+
+    The complex step has no subtractive cancellation, so it is accurate to machine precision for any
+    equation made of analytic NumPy operations. Equations that cannot take complex input fall back to
+    a central difference.
+    Args:
+        equation: A vectorized equation function.
+        h: The size of the imaginary step.
+    Returns:
+        A vectorized function returning the derivative of the equation.
+    """
+    def derivative(x):
+        x = np.asarray(x, dtype=float)
+        try:
+            value = equation(x + 1j * h)
+        except (TypeError, ValueError):
+            value = None
+        if value is None or not np.iscomplexobj(value):
+            return _numerical_derivative(equation, x)
+        return np.imag(value) / h
+    return derivative
+
+
+def derivative_of(equation):
+    """Returns the registered derivative of an equation, or a complex-step derivative if none was registered.
+
+    Equations marked analytic = False, such as compiled expressions using abs, get a central difference
+    instead: the complex step silently drops the derivative of their non-analytic parts.
+    """
+    derivative = _DERIVATIVES.get(equation)
+    if derivative is None:
+        if getattr(equation, 'analytic', True):
+            derivative = complex_step_derivative(equation)
+        else:
+            derivative = partial(_numerical_derivative, equation)
+    return derivative
+
+
+def _jacobian(derivative):
+    """Wraps an element-wise derivative into the Jacobian form fsolve expects for fprime."""
+    return lambda x: np.diag(np.atleast_1d(derivative(x)))
+
+
+def _unique_roots(roots, residuals, iterations, tolerance):
+    """Collapses roots that lie within the tolerance of each other, keeping the one with the smallest residual.
+    Args:
+        roots: Array of converged roots.
+        residuals: Array of |f(root)| values matching roots.
+        iterations: Array of iteration counts matching roots.
+        tolerance: Roots closer than this are treated as the same root.
+    Returns:
+        The sorted, de-duplicated roots, residuals and iteration counts.
+    """
+    if roots.size == 0:
+        return roots, residuals, iterations
+    order = np.argsort(roots)
+    roots, residuals, iterations = roots[order], residuals[order], iterations[order]
+    # A new group starts wherever the gap to the previous root is larger than the tolerance
+    group = np.concatenate(([0], np.cumsum(np.diff(roots) > tolerance)))
+    best = np.lexsort((residuals, group))
+    keep = best[np.concatenate(([True], np.diff(group[best]) != 0))]
+    return roots[keep], residuals[keep], iterations[keep]
+
+
+@profiled()
+def find_roots(equation, guesses, tolerance=1e-6, max_iter=50, xtol=1.49012e-08, fprime=None, unique=True):
+    """Runs a damped Newton iteration on every guess at once to find the roots of an equation.
+
+    All guesses are advanced together as one NumPy array, so a sweep over thousands of starting points
+    costs a handful of vectorized equation calls instead of one fsolve call per guess. Each guess keeps
+    its own convergence flag and stops iterating once its step is smaller than xtol. A step that would
+    increase |f| is halved until it doesn't, which keeps each guess near the root closest to it.
+
+    Args:
+        equation: A vectorized equation function (e.g. equation1 or equation2).
+        guesses: A scalar or array of initial guesses.
+        tolerance: The acceptable error |f(root)| for a found root; also the distance below which
+            two roots are considered the same when unique is True.
+        max_iter: The maximum number of Newton steps taken by any guess.
+        xtol: The step size below which a guess is considered converged.
+        fprime: Optional derivative of the equation, looked up with derivative_of when not given.
+        unique: If True, return only the sorted, de-duplicated converged roots. If False, return one
+            entry per guess with NaN where no root was found.
+    Returns:
+        tuple: Arrays of roots, residuals |f(root)| and iteration counts.
+    """
+    x = np.array(guesses, dtype=float).ravel()
+    if fprime is None:
+        fprime = derivative_of(equation)
+    fx = np.asarray(equation(x), dtype=float)
+    iterations = np.zeros(x.shape, dtype=int)
+    active = np.isfinite(x) & np.isfinite(fx) & (fx != 0)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        xa, fa = x[idx], fx[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = fa / np.asarray(fprime(xa), dtype=float)
+        # A zero or undefined derivative leaves Newton nowhere to go, so those guesses stop here
+        stuck = ~np.isfinite(step)
+        step[stuck] = 0.0
+        x_new = xa - step
+        f_new = np.asarray(equation(x_new), dtype=float)
+        # Halve the step for every guess whose residual got worse
+        for _ in range(10):
+            worse = ~stuck & ~(np.abs(f_new) < np.abs(fa))
+            if not worse.any():
+                break
+            step[worse] *= 0.5
+            x_new[worse] = xa[worse] - step[worse]
+            f_new[worse] = equation(x_new[worse])
+        x[idx], fx[idx] = x_new, f_new
+        iterations[idx] += 1
+        done = stuck | (np.abs(step) <= xtol * (1 + np.abs(x_new))) | (f_new == 0) | ~np.isfinite(f_new)
+        active[idx[done]] = False
+
+    residuals = np.abs(fx)
+    converged = np.isfinite(x) & (residuals <= tolerance)
+    if unique:
+        return _unique_roots(x[converged], residuals[converged], iterations[converged], tolerance)
+    x[~converged] = np.nan
+    return x, residuals, iterations
+
 
-def find_root(equation, guess, tolerance=1e-6):
+@profiled()
+def find_root(equation, guess, tolerance=1e-6, result_cache=None):
     """Attempts to find a root of the given equation near the provided guess.
 
     Args:
         equation: The equation function (either equation1 or equation2).
         guess: An initial guess for the root.
         tolerance: The acceptable error for a found root.
+        result_cache: An optional result_cache.ResultCache. Results for a named equation, guess and
+            tolerance that were solved before, in this or an earlier run, are returned from it.
     Returns:
         The root if found within the tolerance, otherwise None.
     Gemini assisted with the development of this function
     """
-    try:
-        root = fsolve(equation, guess)
-        # Check if the found root is within an acceptable tolerance
-        if abs(equation(root)) <= tolerance:
-            return root[0]
-        else:
-            return None  # Root found, but not accurate enough
-    except ValueError:
-        return None  # No root found
-def find_intersection(guess):
+    identity = equation_identity(equation) if result_cache is not None else None
+    if identity is not None:
+        key = result_cache.key('find_root', identity, guess, tolerance)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return float(cached['root'][0]) if cached['root'].size else None
+    roots, _, _ = find_roots(equation, guess, tolerance, unique=False)
+    root = None if np.isnan(roots[0]) else roots[0]  # NaN: no root found, or not accurate enough
+    if identity is not None:
+        result_cache.put(key, root=[] if root is None else [root])
+    return root
+
+
+def sign_change_brackets(x, y):
+    """Builds the bracket index of a sampled function: every grid interval over which the sign of y flips.
+    Args:
+        x: The sorted sample points.
+        y: The function values at the sample points.
+    Returns:
+        An (m, 2) array of [left, right] x-values, each containing at least one root.
+    """
+    sign = np.sign(y)
+    i = np.flatnonzero(sign[:-1] * sign[1:] < 0)
+    return np.column_stack((x[i], x[i + 1]))
+
+
+@profiled()
+def find_all_roots(equation, start=-15, stop=15, num=200, tolerance=1e-6, xtol=2e-12, x=None, y=None):
+    """Finds every root of an equation on [start, stop] from a single sampling pass.
+
+    The equation is evaluated once on np.linspace(start, stop, num), the same grid used for plotting.
+    Each sign change between neighbouring samples is refined with Brent's method, which is guaranteed
+    to converge inside its bracket. Roots of even multiplicity touch zero without changing sign, so
+    local minima of |f| on the grid are also refined with a bounded minimization and kept when they
+    reach the tolerance. Samples that land exactly on a root are kept as-is. Instead of the uniform
+    grid, precomputed samples such as those from sampling.adaptive_sample can be passed in as x and y.
+
+    Args:
+        equation: A vectorized equation function (e.g. equation1 or equation2).
+        start: The left end of the interval.
+        stop: The right end of the interval.
+        num: The number of grid samples; it must be fine enough to separate neighbouring roots.
+        tolerance: The acceptable error |f(root)| for a found root.
+        xtol: The absolute x tolerance passed to the refinement.
+        x: Optional sorted sample points to use instead of the uniform grid (start, stop and num are
+            then ignored).
+        y: Optional equation values at x, to avoid evaluating the equation on x again.
+    Returns:
+        A sorted array of the distinct roots on the interval.
+    """
+    if x is None:
+        x = np.linspace(start, stop, num)
+    else:
+        x = np.asarray(x, dtype=float)
+    y = np.asarray(equation(x) if y is None else y, dtype=float)
+    roots = list(x[y == 0])
+
+    for a, b in sign_change_brackets(x, y):
+        roots.append(brentq(equation, a, b, xtol=xtol))
+
+    # Touching roots: |f| has a local minimum on the grid with no sign change on either side
+    sign = np.sign(y)
+    ay = np.abs(y)
+    touch = np.flatnonzero((ay[1:-1] <= ay[:-2]) & (ay[1:-1] <= ay[2:])
+                           & (sign[:-2] == sign[1:-1]) & (sign[1:-1] == sign[2:]) & (sign[1:-1] != 0)) + 1
+    for i in touch:
+        result = minimize_scalar(lambda t: abs(equation(t)), bounds=(x[i - 1], x[i + 1]), method='bounded',
+                                 options={'xatol': xtol})
+        if abs(equation(result.x)) <= tolerance:
+            roots.append(result.x)
+
+    roots = np.array(roots, dtype=float)
+    roots = roots[np.abs(equation(roots)) <= tolerance]
+    roots = np.sort(roots)
+    return roots[np.concatenate(([True], np.diff(roots) > tolerance))] if roots.size else roots
+
+
+@profiled()
+def find_intersection(guess, equation_a=equation1, equation_b=equation2, result_cache=None):
     """Finds the intersection point of two functions near a provided guess and plots the functions
        and their intersection. This function uses the fsolve method from scipy.optimize to find the
        root of the difference between two functions, which gives the x-coordinate of the intersection
@@ -69,13 +323,562 @@ def find_intersection(guess):
        two functions.
     Parameters:
        guess: An initial guess for the x-coordinate of the intersection point.
+       equation_a: The first equation, equation1 by default.
+       equation_b: The second equation, equation2 by default.
+       result_cache: An optional result_cache.ResultCache; intersections solved before for the same
+          named equations and guess are returned from it without calling fsolve.
     Returns:
        tuple: A tuple containing the x and y coordinates of the intersection point.
        Gemini assisted with the development of this function"""
 
-    intersection_x = fsolve(lambda x: equation1(x) - equation2(x), guess)
-    intersection_y = equation1(intersection_x)  # Or equation2(intersection_x)
+    key = None
+    if result_cache is not None:
+        identities = equation_identity(equation_a), equation_identity(equation_b)
+        if None not in identities:
+            key = result_cache.key('find_intersection', identities, guess)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return float(cached['point'][0]), float(cached['point'][1])
+    d1, d2 = derivative_of(equation_a), derivative_of(equation_b)
+    intersection_x = fsolve(lambda x: equation_a(x) - equation_b(x), guess,
+                            fprime=_jacobian(lambda x: d1(x) - d2(x)))
+    intersection_y = equation_a(intersection_x)  # Or equation_b(intersection_x)
+    if key is not None:
+        result_cache.put(key, point=[intersection_x[0], intersection_y[0]])
     return intersection_x[0], intersection_y[0]
+
+
+def _difference(x, equation_a, equation_b):
+    """Calculates equation_a(x) - equation_b(x), whose roots are the intersections of the two equations."""
+    return equation_a(x) - equation_b(x)
+
+
+def _scan_chunk(equation_a, equation_b, tolerance, bounds):
+    """Finds the intersections on one chunk of the domain; run in a worker process by find_intersections."""
+    start, stop, num = bounds
+    return find_all_roots(partial(_difference, equation_a=equation_a, equation_b=equation_b),
+                          start, stop, num, tolerance)
+
+
+@profiled()
+def find_intersections(start=-15, stop=15, step=0.05, tolerance=1e-6, chunks=None, max_workers=None,
+                       equation_a=equation1, equation_b=equation2):
+    """Finds every intersection of two equations on [start, stop] by scanning the domain in parallel.
+
+    The interval is split into chunks that share their end points, and each chunk is handed to a
+    process pool where find_all_roots samples the difference of the equations, brackets its sign
+    changes and refines them. Every candidate is checked against the tolerance before it is kept,
+    and intersections found by two neighbouring chunks are merged.
+
+    Args:
+        start: The left end of the interval.
+        stop: The right end of the interval.
+        step: The grid spacing used for sign detection; it must be finer than the gap between intersections.
+        tolerance: The acceptable error |equation_a(x) - equation_b(x)| for an intersection.
+        chunks: The number of chunks to split the interval into, one per worker by default.
+        max_workers: The number of worker processes. With 1 the chunks are scanned in this process.
+        equation_a: The first equation, which must be picklable (defined at module level).
+        equation_b: The second equation, which must be picklable (defined at module level).
+    Returns:
+        A sorted, de-duplicated array of the x-coordinates of the intersections.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if chunks is None:
+        chunks = max_workers
+    edges = np.linspace(start, stop, chunks + 1)
+    num = max(int(np.ceil((stop - start) / (step * chunks))), 1) + 1
+    bounds = [(a, b, num) for a, b in zip(edges[:-1], edges[1:])]
+    scan = partial(_scan_chunk, equation_a, equation_b, tolerance)
+
+    if max_workers == 1 or chunks == 1:
+        found = [scan(b) for b in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            found = list(pool.map(scan, bounds))
+
+    x = np.sort(np.concatenate(found))
+    x = x[np.abs(equation_a(x) - equation_b(x)) <= tolerance]
+    return x[np.concatenate(([True], np.diff(x) > tolerance))] if x.size else x
+
+
+def equation1_family(x, a):
+    """Calculates the first equation with its coefficient as a parameter, x - a·cos(x); a = 3 gives equation1."""
+    return x - a * np.cos(x)
+
+
+def equation2_family(x, b):
+    """Calculates the second equation with its frequency as a parameter, cos(b·x)·x³; b = 2 gives equation2."""
+    return np.cos(b * x) * x**3
+
+
+def equation1_family_partials(x, a):
+    """Calculates the partial derivatives of x - a·cos(x) with respect to x and to a."""
+    return 1 + a * np.sin(x), -np.cos(x)
+
+
+def equation2_family_partials(x, b):
+    """Calculates the partial derivatives of cos(b·x)·x³ with respect to x and to b."""
+    return 3 * x**2 * np.cos(b * x) - b * x**3 * np.sin(b * x), -x**4 * np.sin(b * x)
+
+
+# Registry of known partial derivatives of equation families, looked up by partials_of
+_PARTIALS = {equation1_family: equation1_family_partials, equation2_family: equation2_family_partials}
+
+
+def register_partials(family, partials):
+    """Registers the exact partial derivatives of an equation family f(x, p) for track_roots.
+    Args:
+        family: The family function.
+        partials: A vectorized function of (x, p) returning the tuple (df/dx, df/dp).
+    """
+    _PARTIALS[family] = partials
+
+
+def partials_of(family):
+    """Returns the registered partial derivatives of a family, or complex-step estimates if none were registered."""
+    partials = _PARTIALS.get(family)
+    if partials is None:
+        def partials(x, p):
+            x, p = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(p, dtype=float))
+            return (complex_step_derivative(lambda t: family(t, p))(x),
+                    complex_step_derivative(lambda q: family(x, q))(p))
+    return partials
+
+
+# A fold is where a pair of roots meets and vanishes, or appears, as the parameter moves
+Fold = namedtuple('Fold', ['kind', 'param', 'x'])
+RootBranches = namedtuple('RootBranches', ['params', 'roots', 'folds', 'iterations'])
+IntersectionBranches = namedtuple('IntersectionBranches', ['params_a', 'params_b', 'x', 'y', 'folds', 'iterations'])
+
+
+def _locate_fold(family, partials, x, p, p_range, x_range):
+    """Refines an estimated fold point, where f(x, p) = 0 and df/dx(x, p) = 0 together, with fsolve.
+    Returns:
+        tuple: The (param, x) of the fold, or the estimate itself if fsolve leaves p_range or x_range.
+    """
+    def system(v):
+        return [float(family(v[0], v[1])), float(partials(v[0], v[1])[0])]
+
+    solution, _, ier, _ = fsolve(system, [x, p], full_output=True)
+    if (ier == 1 and np.all(np.isfinite(solution)) and min(p_range) <= solution[1] <= max(p_range)
+            and x_range[0] <= solution[0] <= x_range[1]):
+        return float(solution[1]), float(solution[0])
+    return float(p), float(x)
+
+
+def _folds(kind, x, slopes, p_range, family, partials, x_range, edge):
+    """Pairs up the roots that vanished (or appeared) in one parameter step into fold events.
+
+    Two neighbouring roots with opposite df/dx signs are the two halves of one fold. A root without a
+    partner is its own fold, unless it is within edge of the ends of x_range, where it just left (or
+    entered) the tracked range.
+    """
+    order = np.argsort(x)
+    x, slopes = np.asarray(x)[order], np.asarray(slopes)[order]
+    folds = []
+    i = 0
+    p_mid = 0.5 * (p_range[0] + p_range[1])
+    while i < len(x):
+        if i + 1 < len(x) and np.sign(slopes[i]) != np.sign(slopes[i + 1]):
+            guess, i = 0.5 * (x[i] + x[i + 1]), i + 2
+        else:
+            guess, i = x[i], i + 1
+            if min(guess - x_range[0], x_range[1] - guess) <= edge:
+                continue
+        folds.append(Fold(kind, *_locate_fold(family, partials, guess, p_mid, p_range, x_range)))
+    return folds
+
+
+@profiled()
+def track_roots(family, params, x_range=(-15, 15), num=200, tolerance=1e-6, max_iter=20, guesses=None,
+                partials=None):
+    """Follows every root of a family of equations f(x, p) across a sweep of the parameter p.
+
+    The roots at params[0] are found by find_all_roots on the grid (or refined from guesses). Each step
+    then warm-starts from the previous roots: a tangent predictor moves every root by -f_p/f_x · Δp and
+    a vectorized Newton corrector (find_roots) pulls all of them onto f(·, p) = 0 at once, which usually
+    takes one or two iterations instead of a cold solve. A branch ends at a fold, where it meets another
+    branch and both vanish: the corrector then fails, lands on a root whose df/dx has the other sign, or
+    jumps further than one grid cell. Every step also checks the sign changes of f on the grid for
+    roots no branch is following, which is where new pairs of roots appear; those start new branches.
+    Fold points are refined by solving f = df/dx = 0 for (x, p).
+
+    Args:
+        family: A vectorized function f(x, p), e.g. equation1_family or equation2_family.
+        params: The parameter values to step through, in order.
+        x_range: The (start, stop) interval in which roots are tracked.
+        num: The number of grid samples used to find new roots; it must separate neighbouring roots.
+        tolerance: The acceptable error |f(root, p)| for a root.
+        max_iter: The maximum number of corrector iterations per step.
+        guesses: Optional initial guesses at params[0]; only the branches they converge to are
+            followed from the start, although new roots are still picked up along the way.
+        partials: Optional function of (x, p) returning (df/dx, df/dp); looked up with partials_of by default.
+    Returns:
+        RootBranches: params; roots, a (branches, len(params)) array with NaN where a branch does not
+        exist; folds, a list of Fold(kind, param, x) with kind 'appear' or 'vanish'; and iterations, the
+        corrector and bracketing iterations taken at each step.
+    """
+    params = np.asarray(params, dtype=float).ravel()
+    if partials is None:
+        partials = partials_of(family)
+    grid = np.linspace(x_range[0], x_range[1], num)
+    spacing = grid[1] - grid[0]
+    rows = []  # One array per branch
+    iterations = np.zeros(len(params), dtype=int)
+    folds = []
+
+    def new_row(k, x):
+        row = np.full(len(params), np.nan)
+        row[k] = x
+        rows.append(row)
+        return len(rows) - 1
+
+    p = params[0]
+    if guesses is None:
+        start = find_all_roots(lambda t: family(t, p), x=grid, tolerance=tolerance)
+    else:
+        start, _, its = find_roots(lambda t: family(t, p), guesses, tolerance, fprime=lambda t: partials(t, p)[0])
+        iterations[0] = its.sum()
+    active = [new_row(0, x) for x in start]
+    x = np.array(start, dtype=float)
+
+    for k in range(1, len(params)):
+        p_prev, p = params[k - 1], params[k]
+        if active:
+            fx, fp = partials(x, p_prev)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                predicted = x - fp / fx * (p - p_prev)
+            # A predictor step may move a root up to half way to its nearest neighbour. Next to a fold the
+            # tangent is nearly vertical and overshoots that, so the corrector starts from the old root instead
+            order = np.argsort(x)
+            gaps = np.full(len(x), np.inf)
+            if len(x) > 1:
+                between = np.diff(x[order])
+                gaps[order] = np.minimum(np.append(between, np.inf), np.insert(between, 0, np.inf))
+            far = ~np.isfinite(predicted) | (np.abs(predicted - x) > np.maximum(spacing, 0.5 * gaps))
+            predicted[far] = x[far]
+            corrected, _, its = find_roots(lambda t: family(t, p), predicted, tolerance, max_iter,
+                                           fprime=lambda t: partials(t, p)[0], unique=False)
+            iterations[k] += its.sum()
+            slope = partials(corrected, p)[0]
+            with np.errstate(invalid='ignore'):
+                lost = (np.isnan(corrected) | (corrected < x_range[0]) | (corrected > x_range[1])
+                        | (np.sign(slope) != np.sign(fx)) | (np.abs(corrected - predicted) > spacing))
+            # Two branches that converged onto the same root: the one that moved furthest jumped there
+            order = np.argsort(np.where(lost, np.inf, corrected))
+            same = np.flatnonzero(np.diff(corrected[order]) <= 1e-9 * (1 + np.abs(corrected[order][1:])))
+            for i, j in zip(order[same], order[same + 1]):
+                lost[i if abs(corrected[i] - x[i]) > abs(corrected[j] - x[j]) else j] = True
+            if lost.any():
+                folds += _folds('vanish', x[lost], fx[lost], (p_prev, p), family, partials, x_range, spacing)
+            active = [branch for branch, gone in zip(active, lost) if not gone]
+            x = corrected[~lost]
+            for branch, root in zip(active, x):
+                rows[branch][k] = root
+
+        # Roots in a grid bracket that no branch lies in are new
+        y = family(grid, p)
+        new = []
+        for a, b in sign_change_brackets(grid, y):
+            if not np.any((x >= a) & (x <= b)):
+                root, info = brentq(lambda t: family(t, p), a, b, full_output=True)
+                iterations[k] += info.iterations
+                new.append(root)
+        if new:
+            new = np.array(new)
+            folds += _folds('appear', new, partials(new, p)[0], (p_prev, p), family, partials, x_range, spacing)
+            active += [new_row(k, root) for root in new]
+            x = np.concatenate((x, new))
+
+    roots = np.array(rows) if rows else np.empty((0, len(params)))
+    return RootBranches(params, roots, sorted(folds, key=lambda fold: fold.param * np.sign(params[-1] - params[0])),
+                        iterations)
+
+
+def track_intersections(params_a, params_b, family_a=equation1_family, family_b=equation2_family, **kwargs):
+    """Follows the intersections of two equation families as both parameters move along a sweep.
+
+    The intersections are the roots of f_a(x, a) - f_b(x, b), continued by track_roots along the path
+    that moves linearly from (params_a[i], params_b[i]) to (params_a[i + 1], params_b[i + 1]) in step i.
+    Either parameter can be held fixed by passing a scalar.
+
+    Args:
+        params_a: The values of the first family's parameter, e.g. a in x - a·cos(x).
+        params_b: The values of the second family's parameter, e.g. b in cos(b·x)·x³.
+        family_a: The first family, equation1_family by default.
+        family_b: The second family, equation2_family by default.
+        **kwargs: Passed on to track_roots (x_range, num, tolerance, max_iter, guesses).
+    Returns:
+        IntersectionBranches: params_a and params_b; x and y, (branches, steps) arrays of the intersection
+        points with NaN where a branch does not exist; folds, whose param is the fractional step index
+        along the sweep; and iterations per step.
+    """
+    params_a, params_b = (np.array(p, dtype=float) for p in np.broadcast_arrays(np.ravel(params_a),
+                                                                                 np.ravel(params_b)))
+    steps = np.arange(len(params_a), dtype=float)
+    slope_a = np.append(np.diff(params_a), 0.0)
+    slope_b = np.append(np.diff(params_b), 0.0)
+    partials_a, partials_b = partials_of(family_a), partials_of(family_b)
+
+    def at(t):
+        i = np.clip(np.floor(t).astype(int), 0, max(len(steps) - 2, 0))
+        return np.interp(t, steps, params_a), np.interp(t, steps, params_b), slope_a[i], slope_b[i]
+
+    def difference(x, t):
+        a, b, _, _ = at(t)
+        return family_a(x, a) - family_b(x, b)
+
+    def difference_partials(x, t):
+        a, b, da, db = at(t)
+        dxa, dpa = partials_a(x, a)
+        dxb, dpb = partials_b(x, b)
+        return dxa - dxb, dpa * da - dpb * db
+
+    result = track_roots(difference, steps, partials=difference_partials, **kwargs)
+    y = family_a(result.roots, params_a)
+    return IntersectionBranches(params_a, params_b, result.roots, y, result.folds, result.iterations)
+
+
+# Equations that batch jobs can refer to by name
+EQUATIONS = {'equation1': equation1, 'equation2': equation2}
+
+# Longer equation strings are rejected, which also bounds how deeply they can nest
+MAX_EXPRESSION_LENGTH = 1000
+
+# The only names, functions and operators an equation string may use
+_CONSTANTS = {'pi': np.pi, 'e': np.e}
+_FUNCTIONS = {'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin, 'arccos': np.arccos,
+              'arctan': np.arctan, 'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh, 'exp': np.exp,
+              'log': np.log, 'log10': np.log10, 'sqrt': np.sqrt, 'abs': np.abs}
+# Functions whose complex extension is not the analytic continuation of the real one; np.abs of a complex
+# number is its modulus, so a complex step through abs loses the sign of d|u|/dx
+_NON_ANALYTIC_FUNCTIONS = {'abs'}
+_BINARY_OPERATORS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+                     ast.Pow: np.power}
+_UNARY_OPERATORS = {ast.USub: np.negative, ast.UAdd: np.positive}
+
+
+def _build(node):
+    """Turns a parsed expression node into either a float (for constant sub-expressions) or a function of x.
+
+    Only numbers, x, the names in _CONSTANTS, the functions in _FUNCTIONS and arithmetic operators are
+    accepted; anything else raises ValueError, so no user text is ever evaluated as Python.
+    """
+    if isinstance(node, ast.Expression):
+        return _build(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        if node.id == 'x':
+            return lambda x: x
+        if node.id in _CONSTANTS:
+            return _CONSTANTS[node.id]
+        raise ValueError(f"unknown name {node.id!r}")
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left, right = _build(node.left), _build(node.right)
+        # Fold constant sub-expressions once instead of on every call
+        if isinstance(left, float) and isinstance(right, float):
+            return float(op(left, right))
+        if isinstance(left, float):
+            return lambda x: op(left, right(x))
+        if isinstance(right, float):
+            return lambda x: op(left(x), right)
+        return lambda x: op(left(x), right(x))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _build(node.operand)
+        if isinstance(operand, float):
+            return float(op(operand))
+        return lambda x: op(operand(x))
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+            raise ValueError(f"unknown function {ast.unparse(node.func)!r}")
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError(f"{node.func.id}() takes exactly one argument")
+        func = _FUNCTIONS[node.func.id]
+        arg = _build(node.args[0])
+        if isinstance(arg, float):
+            return float(func(arg))
+        return lambda x: func(arg(x))
+    raise ValueError(f"unsupported syntax {ast.unparse(node)!r}")
+
+
+class CompiledExpression:
+    """A vectorized NumPy function compiled from an equation string such as "x - 3*cos(x)".
+
+    Instances behave like equation1 and equation2: they take a scalar or an array and return an array
+    of the same shape, so they can be passed to find_root, find_roots, find_all_roots,
+    find_intersection(s) and plotted directly. They pickle by expression, so they also work with the
+    process pool in find_intersections.
+
+    Attributes:
+        expression: The normalized expression.
+        analytic: False if the expression calls a function in _NON_ANALYTIC_FUNCTIONS, which tells
+            derivative_of not to use a complex step.
+    """
+
+    def __init__(self, expression, function, analytic=True):
+        self.expression = expression
+        self.analytic = analytic
+        self._function = function
+
+    def __call__(self, x):
+        x = np.asarray(x)
+        if isinstance(self._function, float):
+            # A constant expression still has to return one value per input point
+            return np.full(x.shape, self._function, dtype=np.result_type(x, float))
+        return self._function(x)
+
+    def __reduce__(self):
+        return compile_expression, (self.expression,)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.expression!r})"
+
+
+def _parse(expression):
+    """Parses an equation string, reading ^ as a power, and raises ValueError on a syntax error."""
+    if not isinstance(expression, str):
+        raise ValueError(f"an equation must be a string, not {type(expression).__name__}")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"equation is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        return ast.parse(expression.replace('^', '**').strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"invalid equation {expression!r}: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise ValueError("equation is nested too deeply") from None
+
+
+@lru_cache(maxsize=256)
+def _compile_normalized(expression):
+    """Compiles a normalized expression; cached so spellings of the same equation share one function."""
+    try:
+        tree = _parse(expression)
+        analytic = not any(isinstance(node, ast.Call) and getattr(node.func, 'id', None) in _NON_ANALYTIC_FUNCTIONS
+                           for node in ast.walk(tree))
+        return CompiledExpression(expression, _build(tree), analytic)
+    except OverflowError:
+        raise ValueError(f"a number in {expression!r} is too large") from None
+    except RecursionError:
+        raise ValueError("equation is nested too deeply") from None
+
+
+def compile_expression(expression):
+    """Compiles an equation string in x into a vectorized NumPy function.
+
+    The string is parsed once and normalized to a canonical spelling ("x-3*cos(x)" and "x - 3*cos(x)"
+    are the same equation), and the compiled function is kept in an LRU cache keyed on that spelling.
+    The exact string is cached as well, so compiling it again skips parsing entirely.
+    Args:
+        expression: The right-hand side of f(x) = 0, e.g. "x - 3*cos(x)" or "cos(2*x) * x^3".
+    Returns:
+        CompiledExpression: The compiled equation.
+    Raises:
+        ValueError: If the expression is not a string, is malformed, is longer than MAX_EXPRESSION_LENGTH,
+            contains a number too large for a float, or uses anything other than x, numbers, pi, e,
+            arithmetic and the supported functions.
+    """
+    # Checked before the cache, which would raise TypeError for unhashable input
+    if not isinstance(expression, str):
+        raise ValueError(f"an equation must be a string, not {type(expression).__name__}")
+    return _compile_string(expression)
+
+
+@lru_cache(maxsize=256)
+def _compile_string(expression):
+    """Compiles an exact equation string; cached so compiling the same string again skips parsing."""
+    tree = _parse(expression)
+    try:
+        normalized = ast.unparse(tree)
+    except RecursionError:
+        raise ValueError("equation is nested too deeply") from None
+    return _compile_normalized(normalized)
+
+
+def get_equation(equation):
+    """Returns the equation function for a callable, a name in EQUATIONS, or an equation string."""
+    if callable(equation):
+        return equation
+    if isinstance(equation, str) and equation in EQUATIONS:
+        return EQUATIONS[equation]
+    return compile_expression(equation)
+
+
+def solve_job(job):
+    """Solves one batch job and returns its result as a JSON-ready dict.
+
+    A job is a dict with a "type" of "root" or "intersection", the "equation" (or the two "equations")
+    by name or as an equation string such as "x - 3*cos(x)", and either a list of "guesses" or an
+    "interval" [start, stop] to scan. "tolerance" and "id" are optional; the id is copied to the result.
+
+    Args:
+        job: The decoded job.
+    Returns:
+        dict: The roots with their residuals, or the intersection points, or an "error" message.
+    """
+    result = {'id': job.get('id')}
+    try:
+        tolerance = float(job.get('tolerance', 1e-6))
+        if job.get('type', 'root') == 'root':
+            equation = get_equation(job['equation'])
+            if 'interval' in job:
+                roots = find_all_roots(equation, *job['interval'], tolerance=tolerance)
+            else:
+                roots, _, _ = find_roots(equation, job['guesses'], tolerance)
+            result['roots'] = roots.tolist()
+            result['residuals'] = np.abs(equation(roots)).tolist()
+        elif job['type'] == 'intersection':
+            equation_a, equation_b = (get_equation(name) for name in job.get('equations', ('equation1', 'equation2')))
+            if 'interval' in job:
+                x = find_intersections(*job['interval'], tolerance=tolerance, max_workers=1,
+                                       equation_a=equation_a, equation_b=equation_b)
+            else:
+                d1, d2 = derivative_of(equation_a), derivative_of(equation_b)
+                x, _, _ = find_roots(partial(_difference, equation_a=equation_a, equation_b=equation_b),
+                                     job['guesses'], tolerance, fprime=lambda t: d1(t) - d2(t))
+            result['intersections'] = np.column_stack((x, equation_a(x))).tolist()
+        else:
+            raise ValueError(f"unknown job type {job['type']!r}")
+    except KeyError as e:
+        result['error'] = f"missing or unknown field {e}"
+    except (TypeError, ValueError) as e:
+        result['error'] = str(e)
+    return result
+
+
+def run_batch(infile, outfile):
+    """Streams JSON-lines jobs from infile to JSON-lines results in outfile, one line at a time.
+
+    Only the current job is held in memory, so the input can be arbitrarily long. Blank lines are
+    skipped, and lines that are not valid JSON or whose job fails in any way produce an error result
+    instead of stopping the run.
+
+    Args:
+        infile: A text file (or sys.stdin) with one JSON job per line.
+        outfile: A text file (or sys.stdout) that receives one JSON result per line.
+    """
+    for line_number, line in enumerate(infile, start=1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            result = {'id': None, 'line': line_number, 'error': f"invalid JSON: {e}"}
+        else:
+            if not isinstance(job, dict):
+                result = {'id': None, 'line': line_number, 'error': "job must be a JSON object"}
+            else:
+                try:
+                    result = solve_job(job)
+                except Exception as e:  # One bad job must not end the stream
+                    result = {'id': job.get('id'), 'line': line_number, 'error': f"{type(e).__name__}: {e}"}
+        outfile.write(json.dumps(result) + "\n")
+        outfile.flush()
+
+
 def root_intersection_finder():
     """
     This function is trying to find roots of two equations (equation1 and equation2) using
@@ -90,12 +893,17 @@ def root_intersection_finder():
     list of tuples. Each tuple contains an equation and a list of initial guesses for that equation.
     I worked diligently with chatgpt to develop this function.
     """
-    # Plotting
-    x = np.linspace(-15, 15, 200)  # Range for plotting
+    # Imported here so the batch mode never pays for matplotlib
+    import matplotlib.pyplot as plt
+
+    # Plotting: each equation is sampled adaptively over the range, and the same samples bracket its roots
+    x1, y1 = adaptive_sample(equation1, -15, 15)
+    x2, y2 = adaptive_sample(equation2, -15, 15)
+    all_roots = {equation1: find_all_roots(equation1, x=x1, y=y1), equation2: find_all_roots(equation2, x=x2, y=y2)}
 
     # Plot equation 1 to assist in initial guess
     plt.figure(1)
-    plt.plot(x, equation1(x))
+    plt.plot(x1, y1)
     plt.xlabel('x')
     plt.ylabel('y')
     plt.title('Plot of x - 3cos(x) = 0')
@@ -109,7 +917,7 @@ def root_intersection_finder():
 
     # Plot equation 2 to assist in intial guess
     plt.figure(2)
-    plt.plot(x, equation2(x))
+    plt.plot(x2, y2)
     plt.xlabel('x')
     plt.ylabel('y')
     plt.title('Plot of cos(2x) \u00B7 x\u00B3 = 0')
@@ -122,6 +930,7 @@ def root_intersection_finder():
 
     # Locate the roots near the guess for each equation
     for equation, guesses in [(equation1, guesses_eqn1), (equation2, guesses_eqn2)]:
+        roots = all_roots[equation]
         for i, guess in enumerate(guesses):  # Track guess index
             if equation == equation1:
                 root1 = find_root(equation, guess)
@@ -130,6 +939,8 @@ def root_intersection_finder():
                     plt.figure(1)
                     plt.plot(root1, 0, 'ro')
                 else:  # if no root is found near the guess for eqn 1
+                    if len(roots):
+                        print(f"The nearest root on the plotted range is at x = {roots[np.argmin(np.abs(roots - guess))]:.4f}")
                     while True:
                         response = input(f"Unable to locate root near guess {guess} for equation x - 3cos(x) = 0, guess again? (y/n): ").lower()
                         if response == 'y':
@@ -152,6 +963,8 @@ def root_intersection_finder():
                     plt.figure(2)
                     plt.plot(root2, 0, 'ro')
                 else:  # if no root is found near the guess for eqn 2
+                    if len(roots):
+                        print(f"The nearest root on the plotted range is at x = {roots[np.argmin(np.abs(roots - guess))]:.4f}")
                     while True:
                         response = input(f"Unable to locate root near guess {guess} for equation cos(2x) \u00B7 x\u00B3 = 0, guess again? (y/n): ").lower()
                         if response == 'y':
@@ -168,12 +981,10 @@ def root_intersection_finder():
                             print("Invalid response. Please enter 'y' or 'n'.")
 
 
-    x = np.linspace(-15, 15, 200)  # Range for plotting
-
     # Check if root1 is not None before plotting
     if root1 is not None:
         plt.figure(1)
-        plt.plot(x, equation1(x))
+        plt.plot(x1, y1)
         plt.plot(root1, 0, 'ro')  # Mark root with red dot
     # Plot Labels
         plt.xlabel('x')
@@ -184,7 +995,7 @@ def root_intersection_finder():
     # Check if root2 is not None before plotting
     if root2 is not None:
         plt.figure(2)
-        plt.plot(x, equation2(x))
+        plt.plot(x2, y2)
         plt.plot(root2, 0, 'ro')  # Mark root with red dot
     # Plot Labels
         plt.xlabel('x')
@@ -206,9 +1017,8 @@ def root_intersection_finder():
     x_intersect, y_intersect = find_intersection(user_guess)
 
     # Plotting the intersection point
-    x = np.linspace(-10, 10, 200)
-    plt.plot(x, equation1(x), label="x - 3cos(x)")
-    plt.plot(x, equation2(x), label="cos(2x) * x^3")
+    plt.plot(*adaptive_sample(equation1, -10, 10), label="x - 3cos(x)")
+    plt.plot(*adaptive_sample(equation2, -10, 10), label="cos(2x) * x^3")
     plt.scatter(x_intersect, y_intersect, color='red', label="Intersection")
     plt.xlabel("x")
     plt.ylabel("y")
@@ -218,7 +1028,17 @@ def root_intersection_finder():
     print("The equations intersect at the point:", (x_intersect, y_intersect))
 
 if __name__ == "__main__":
-    root_intersection_finder()
+    parser = argparse.ArgumentParser(description="Find roots and intersections of x - 3cos(x) and cos(2x)x^3.")
+    parser.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                        help="solve JSON-lines jobs from FILE (or stdin) instead of running interactively")
+    args = parser.parse_args()
+    if args.batch is None:
+        root_intersection_finder()
+    elif args.batch == '-':
+        run_batch(sys.stdin, sys.stdout)
+    else:
+        with open(args.batch) as infile:
+            run_batch(infile, sys.stdout)
 
 
 
@@ -8,8 +8,47 @@
 #
 # Assumptions:
 #      The user knows the dimensions of the augmented matrix and its A and b values.
+#
+# Files instead of prompts:
+#   python hw4c.py systems.txt more.npy ...
+#   Text files hold rows of numbers separated by spaces or commas, with a blank line between matrices.
+#   .npy/.npz files hold one (n, n+1) matrix or a stacked (k, n, n+1) array per entry.
+#   --result-cache results.sqlite reuses the solutions of systems solved in earlier runs.
+import argparse
+import hashlib
+import io
+import itertools
+import os
+import sys
+import warnings
+from collections import Counter, OrderedDict, namedtuple
+
 import numpy as np
-from scipy.linalg import solve
+from scipy import sparse
+from scipy.linalg import (LinAlgError, LinAlgWarning, cho_factor, cho_solve, lu_factor, lu_solve, solve,
+                          solve_banded, solve_triangular)
+from scipy.linalg.lapack import get_lapack_funcs
+from scipy.sparse.linalg import MatrixRankWarning, cg, spsolve
+
+from profiling import profiled
+from result_cache import ResultCache
+
+# Per-system status values returned by solve_batch
+STATUS_OK = "ok"
+STATUS_ILL_CONDITIONED = "ill-conditioned"
+STATUS_SINGULAR = "singular"
+STATUS_INVALID = "invalid"
+
+# Condition numbers above these mark a system as singular or ill-conditioned
+SINGULAR_CONDITION = 1 / np.finfo(float).eps
+ILL_CONDITIONED_CONDITION = 1e10
+
+# solve_batch checks conditioning with one batched SVD up to this many unknowns, and with an LU-based
+# estimate per system above it, where the SVD costs much more than the solve
+BATCHED_CONDITION_MAX_SIZE = 32
+
+# solve_refined factors in float32 from this many unknowns up; smaller systems are faster in float64
+MIXED_PRECISION_MIN_SIZE = 500
 
 def get_matrix_from_user():
     """
@@ -37,17 +76,621 @@ def get_matrix_from_user():
 
     return np.array(matrix)
 
-def solve_system():
+def _condition(rcond):
+    """Turns a LAPACK reciprocal condition estimate into a condition number (inf when A is singular)."""
+    return 1 / rcond if rcond > 0 else np.inf
+
+def _checked(factorization):
+    """Replaces a factorization whose condition estimate is too large to trust with a singular marker."""
+    if not factorization.condition < SINGULAR_CONDITION:
+        return Factorization("singular", None, factorization.condition)
+    return factorization
+
+class Factorization(namedtuple("Factorization", "kind factors condition")):
     """
-    Continuously prompts the user to input augmented matrices and solves the corresponding
-    systems of equations until the user chooses to stop.
-    If the system of equations cannot be solved, the function will print an error message
-    and prompt the user to input another system.
-    Chatgpt assisted with the development of this function.
+    A factored coefficient matrix. kind is "cholesky" or "lu", factors is the output of
+    scipy.linalg.cho_factor or lu_factor, and condition is the LAPACK estimate of the 1-norm
+    condition number of A, computed from the factors in O(n^2).
     """
-    # Define subscript numbers as a dictionary
-    subscript = {"0": "₀", "1": "₁", "2": "₂", "3": "₃", "4": "₄", "5": "₅", "6": "₆", "7": "₇", "8": "₈", "9": "₉"}
+    __slots__ = ()
+
+    def solve(self, b):
+        """
+        Solves A x = b with the stored factors in O(n^2).
+        Parameters:
+            b: A right-hand side of shape (n,), or several of them as the columns of an (n, m) array.
+        Returns:
+            numpy.ndarray: The solution, with the same shape as b.
+        """
+        if self.kind == "cholesky":
+            return cho_solve(self.factors, b)
+        return lu_solve(self.factors, b)
+
+class FactorizationCache:
+    """
+    A bounded LRU cache of LU/Cholesky factorizations keyed by a hash of A's shape, dtype and bytes.
+    Solving against a matrix that is already cached costs two triangular solves instead of a new
+    factorization. Symmetric matrices with a positive diagonal are tried with Cholesky first and fall
+    back to LU if they turn out not to be positive definite.
+    Attributes:
+        maxsize (int): The number of factorizations kept before the least recently used is evicted.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to factor A.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(A):
+        """Returns the cache key of a matrix: a digest of its shape, dtype and contents."""
+        A = np.ascontiguousarray(A)
+        # sha1 is used for speed (the key only has to tell matrices apart), not for security
+        digest = hashlib.sha1(f"{A.shape}{A.dtype.str}".encode())
+        digest.update(A.data)
+        return digest.hexdigest()
+
+    @profiled()
+    def factor(self, A):
+        """
+        Returns the factorization of A, from the cache when possible.
+        Parameters:
+            A: A square coefficient matrix.
+        Returns:
+            Factorization: The cached or newly computed factorization.
+        Raises:
+            LinAlgError: If A is singular. Singular matrices are cached too, so repeats fail fast.
+        """
+        A = np.asarray(A, dtype=float)
+        key = self.key(A)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = self._factor(A)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if entry.kind == "singular":
+            raise LinAlgError("Singular matrix")
+        return entry
+
+    @staticmethod
+    def _factor(A):
+        anorm = np.linalg.norm(A, 1)
+        # Exact symmetry only: cho_factor reads one triangle, so a nearly symmetric A would be
+        # solved as a different matrix
+        if np.array_equal(A, A.T) and np.all(np.diag(A) > 0):
+            try:
+                factors = cho_factor(A)
+            except LinAlgError:
+                pass  # Symmetric but not positive definite
+            else:
+                pocon, = get_lapack_funcs(("pocon",), (A,))
+                rcond, _ = pocon(factors[0], anorm, uplo="L" if factors[1] else "U")
+                return _checked(Factorization("cholesky", factors, _condition(rcond)))
+        with warnings.catch_warnings():
+            # An exactly singular A only warns here; the condition estimate below catches it
+            warnings.simplefilter("ignore", LinAlgWarning)
+            factors = lu_factor(A)
+        gecon, = get_lapack_funcs(("gecon",), (A,))
+        rcond, _ = gecon(factors[0], anorm)
+        return _checked(Factorization("lu", factors, _condition(rcond)))
+
+    def solve(self, A, b):
+        """
+        Solves A x = b, reusing the cached factorization of A.
+        Parameters:
+            A: A square coefficient matrix.
+            b: A right-hand side of shape (n,), or several of them as the columns of an (n, m) array.
+        Returns:
+            numpy.ndarray: The solution, with the same shape as b.
+        """
+        return self.factor(A).solve(np.asarray(b, dtype=float))
+
+    def clear(self):
+        """Removes every cached factorization and resets the hit and miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Shared by the interactive loop so re-entering a coefficient matrix skips the factorization
+_factorization_cache = FactorizationCache()
+
+RefinedSolution = namedtuple("RefinedSolution", "x residual_norm condition iterations precision")
+RefinedSolution.__doc__ = """
+    The result of solve_refined.
+    x is the solution, residual_norm is the infinity norm of b - A x computed in float64, condition is
+    the LAPACK estimate of the 1-norm condition number of A, iterations is the number of refinement
+    steps taken, and precision is the dtype A was factored in ("float32" or "float64").
+    """
+
+def _norms(A):
+    """Returns the 1-norm and the infinity-norm of A without the full-size abs(A) temporary that
+    np.linalg.norm builds. LAPACK's lange reads Fortran order, and the 1-norm of A is the
+    infinity-norm of A.T, so C-ordered input is passed transposed rather than copied."""
+    lange, = get_lapack_funcs(("lange",), (A,))
+    if A.flags.f_contiguous:
+        return lange("1", A), lange("I", A)
+    return lange("I", A.T), lange("1", A.T)
+
+def _factor_with_condition(A, anorm, overwrite_a=False):
+    """Factors A with LU in A's own precision and estimates its condition number from the factors.
+    With overwrite_a the factors replace A in place instead of going into a copy."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", LinAlgWarning)
+        factors = lu_factor(A, overwrite_a=overwrite_a, check_finite=False)
+    gecon, = get_lapack_funcs(("gecon",), (A,))
+    rcond, _ = gecon(factors[0], anorm)
+    return factors, _condition(rcond)
+
+@profiled()
+def solve_refined(A, b, mixed=None, max_iter=10):
+    """
+    Solves A x = b to full float64 accuracy, factoring large systems in float32 for speed.
+    In mixed mode A is factored in float32 (half the memory and roughly twice the speed of float64)
+    and the solution is corrected by iterative refinement: the residual b - A x is computed in
+    float64 and the float32 factors solve for the correction. If A is too ill-conditioned for
+    float32 (condition * eps32 close to 1) or refinement stalls, A is refactored in float64.
+    Unlike np.around'ed output, the returned residual norm and condition estimate make an
+    unreliable answer visible.
+    Parameters:
+        A: A square coefficient matrix.
+        b: The right-hand side, of shape (n,) or (n, m).
+        mixed (bool): Factor in float32. By default only for n >= MIXED_PRECISION_MIN_SIZE.
+        max_iter (int): The maximum number of refinement steps.
+    Returns:
+        RefinedSolution: The solution with its residual norm, condition estimate, iterations and precision.
+    Raises:
+        LinAlgError: If A is singular.
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n = A.shape[0]
+    if mixed is None:
+        mixed = n >= MIXED_PRECISION_MIN_SIZE
+    anorm, a_norm_inf = _norms(A)
+    b_norm = np.linalg.norm(b, np.inf)
+    # LAPACK's dsgesv stopping rule: the residual is at the level of float64 rounding
+    eps = np.finfo(np.float64).eps * np.sqrt(n)
+
+    if mixed:
+        # A32 is a private copy, so it is factored in place: the float32 path then holds A, A32 and
+        # nothing more, instead of A, A32 and the LU copy of A32
+        factors, condition = _factor_with_condition(A.astype(np.float32, order="F"), np.float32(anorm),
+                                                    overwrite_a=True)
+        if condition * np.finfo(np.float32).eps < 0.5:
+            x = lu_solve(factors, b.astype(np.float32)).astype(np.float64)
+            for iteration in range(max_iter + 1):
+                r = b - A @ x
+                residual_norm = np.linalg.norm(r, np.inf)
+                if residual_norm <= eps * (a_norm_inf * np.linalg.norm(x, np.inf) + b_norm):
+                    return RefinedSolution(x, residual_norm, condition, iteration, "float32")
+                if iteration < max_iter:
+                    x += lu_solve(factors, r.astype(np.float32))
+
+    factors, condition = _factor_with_condition(A, anorm)
+    if not condition < SINGULAR_CONDITION:
+        raise LinAlgError("Singular matrix")
+    x = lu_solve(factors, b)
+    return RefinedSolution(x, np.linalg.norm(b - A @ x, np.inf), condition, 0, "float64")
+
+def _bandwidth(rows, cols):
+    """Returns the (lower, upper) bandwidth of the nonzero entries at the given row and column indices."""
+    if len(rows) == 0:
+        return 0, 0
+    offset = cols - rows
+    return int(max(-offset.min(), 0)), int(max(offset.max(), 0))
+
+def _is_banded(lower, upper, n):
+    """Decides whether a band is narrow enough for solve_banded to beat a full factorization."""
+    return lower + upper + 1 <= max(3, n // 8)
+
+def detect_structure(A):
+    """
+    Inspects a coefficient matrix and names the cheapest way to solve with it.
+    Parameters:
+        A: A square numpy array or scipy.sparse matrix.
+    Returns:
+        structure (str): "diagonal", "lower-triangular", "upper-triangular", "banded", "symmetric" or
+            "general" for dense input; "banded", "sparse-symmetric" or "sparse" for sparse input.
+        bandwidth (tuple): The (lower, upper) bandwidth of A.
+    """
+    if sparse.issparse(A):
+        coo = sparse.coo_matrix(A)
+        mask = coo.data != 0
+        lower, upper = _bandwidth(coo.row[mask], coo.col[mask])
+        if lower == 0 and upper == 0:
+            return "diagonal", (0, 0)
+        # A wide band that is mostly empty is cheaper to solve as a general sparse matrix
+        if _is_banded(lower, upper, A.shape[0]) and 2 * np.count_nonzero(mask) >= (lower + upper + 1) * A.shape[0]:
+            return "banded", (lower, upper)
+        if (abs(A - A.T) > 0).nnz == 0:
+            return "sparse-symmetric", (lower, upper)
+        return "sparse", (lower, upper)
+    n = A.shape[0]
+    if n > 1 and A[-1, 0] != 0 and A[0, -1] != 0:
+        # Both corners are set, so the band is full and there is nothing to scan
+        lower = upper = n - 1
+    else:
+        # The first and last nonzero column of each row bound the band without listing every nonzero
+        nonzero = A != 0
+        rows = np.flatnonzero(nonzero.any(axis=1))
+        first = nonzero[rows].argmax(axis=1)
+        last = n - 1 - nonzero[rows, ::-1].argmax(axis=1)
+        lower, upper = _bandwidth(np.concatenate((rows, rows)), np.concatenate((first, last)))
+    if lower == 0 and upper == 0:
+        structure = "diagonal"
+    elif upper == 0:
+        structure = "lower-triangular"
+    elif lower == 0:
+        structure = "upper-triangular"
+    elif _is_banded(lower, upper, n):
+        structure = "banded"
+    elif np.array_equal(A, A.T):
+        structure = "symmetric"
+    else:
+        structure = "general"
+    return structure, (lower, upper)
+
+def _banded_form(A, lower, upper):
+    """Packs the band of A into the (lower + upper + 1, n) layout expected by scipy.linalg.solve_banded."""
+    n = A.shape[0]
+    ab = np.zeros((lower + upper + 1, n))
+    if sparse.issparse(A):
+        coo = sparse.coo_matrix(A)
+        # Explicitly stored zeros may lie outside the band, which detect_structure ignores too
+        mask = coo.data != 0
+        np.add.at(ab, (upper + coo.row[mask] - coo.col[mask], coo.col[mask]), coo.data[mask])
+        return ab
+    for k in range(-lower, upper + 1):
+        if k >= 0:
+            ab[upper - k, k:] = np.diagonal(A, k)
+        else:
+            ab[upper - k, :n + k] = np.diagonal(A, k)
+    return ab
+
+@profiled()
+def solve_structured(A, b):
+    """
+    Solves A x = b with the fastest solver that fits the structure of A, without densifying sparse input.
+    Dense diagonal, triangular and banded matrices use elementwise division, solve_triangular and
+    solve_banded; symmetric matrices try Cholesky first; anything else uses the general dense solver.
+    Sparse matrices (COO, CSR, ...) that are narrow-banded are packed straight into solve_banded form,
+    symmetric ones with a positive diagonal try conjugate gradients, and the rest use spsolve.
+    Parameters:
+        A: A square numpy array or scipy.sparse matrix.
+        b: The right-hand side, of shape (n,).
+    Returns:
+        x (numpy.ndarray): The solution.
+        path (str): The solver that was used: "diagonal", "triangular", "banded", "cholesky",
+            "symmetric", "general", "sparse-cg" or "sparse-direct".
+    Raises:
+        LinAlgError: If A is singular.
+    """
+    b = np.asarray(b, dtype=float)
+    if not sparse.issparse(A):
+        A = np.asarray(A, dtype=float)
+    structure, (lower, upper) = detect_structure(A)
+
+    if structure == "diagonal":
+        d = A.diagonal()
+        if np.any(d == 0):
+            raise LinAlgError("Singular matrix")
+        return b / d, "diagonal"
+    if structure in ("lower-triangular", "upper-triangular"):
+        if np.any(np.diagonal(A) == 0):
+            raise LinAlgError("Singular matrix")
+        return solve_triangular(A, b, lower=structure == "lower-triangular", check_finite=False), "triangular"
+    if structure == "banded":
+        return solve_banded((lower, upper), _banded_form(A, lower, upper), b), "banded"
+    if structure == "symmetric":
+        if np.all(np.diagonal(A) > 0):
+            try:
+                return cho_solve(cho_factor(A), b), "cholesky"
+            except LinAlgError:
+                pass  # Not positive definite
+        return solve(A, b, assume_a="sym"), "symmetric"
+    if structure == "general":
+        return solve(A, b), "general"
+
+    A = sparse.csr_matrix(A)
+    if structure == "sparse-symmetric" and np.all(A.diagonal() > 0):
+        # Conjugate gradients only converges for positive definite A; fall back to a direct solve otherwise
+        x, info = cg(A, b, rtol=1e-10, maxiter=10 * A.shape[0])
+        if info == 0 and np.all(np.isfinite(x)):
+            return x, "sparse-cg"
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", MatrixRankWarning)
+        try:
+            x = spsolve(A.tocsc(), b)
+        except MatrixRankWarning:
+            raise LinAlgError("Singular matrix") from None
+    return x, "sparse-direct"
+
+def _solve_structured_with_condition(A, b):
+    """
+    Solves A x = b through the cheap solvers of solve_structured when A is diagonal, triangular or
+    narrow-banded, and estimates the 1-norm condition number of A from the same factors.
+    Parameters:
+        A: A square numpy array.
+        b: The right-hand side, of shape (n,).
+    Returns:
+        tuple: (x, condition), with x None if A is singular; or None if A has no structure to exploit.
+    """
+    structure, (lower, upper) = detect_structure(A)
+    if structure == "diagonal":
+        d = np.abs(A.diagonal())
+        if not d.min() > 0:
+            return None, np.inf
+        return b / A.diagonal(), d.max() / d.min()
+    if structure in ("lower-triangular", "upper-triangular"):
+        trcon, = get_lapack_funcs(("trcon",), (A,))
+        uplo = "L" if structure == "lower-triangular" else "U"
+        rcond, _ = trcon(A, uplo=uplo)
+        condition = _condition(rcond)
+        if not condition < SINGULAR_CONDITION:
+            return None, condition
+        return solve_triangular(A, b, lower=uplo == "L", check_finite=False), condition
+    if structure == "banded":
+        gbtrf, gbtrs, gbcon = get_lapack_funcs(("gbtrf", "gbtrs", "gbcon"), (A,))
+        # gbtrf needs lower extra rows above the band for the fill-in of row pivoting
+        ab = np.zeros((2 * lower + upper + 1, A.shape[0]))
+        ab[lower:] = _banded_form(A, lower, upper)
+        lu, ipiv, info = gbtrf(ab, lower, upper, overwrite_ab=True)
+        if info > 0:
+            return None, np.inf
+        rcond, _ = gbcon(lower, upper, lu, ipiv, _norms(A)[0])
+        condition = _condition(rcond)
+        if not condition < SINGULAR_CONDITION:
+            return None, condition
+        x, _ = gbtrs(lu, lower, upper, b[:, np.newaxis], ipiv)
+        return x[:, 0], condition
+    return None
 
+def _solve_batch_cached(systems, cache, result_cache):
+    """solve_batch through a ResultCache: systems solved before are answered from it, the rest are
+    solved together by one solve_batch call and stored. Invalid systems are cheap to detect and not stored."""
+    items = list(systems)
+    solutions = [None] * len(items)
+    statuses = [None] * len(items)
+    keys = {}
+    for i, system in enumerate(items):
+        try:
+            matrix = np.asarray(system, dtype=float)
+        except (TypeError, ValueError):
+            continue  # Left to solve_batch, which reports it as invalid
+        key = result_cache.key("solve_batch", matrix)
+        cached = result_cache.get(key)
+        if cached is None:
+            keys[i] = key
+        else:
+            statuses[i] = str(cached["status"])
+            solutions[i] = cached["x"] if statuses[i] != STATUS_SINGULAR else None
+    missing = [i for i, status in enumerate(statuses) if status is None]
+    if missing:
+        for i, x, status in zip(missing, *solve_batch([items[i] for i in missing], cache=cache)):
+            solutions[i], statuses[i] = x, status
+            if i in keys and status != STATUS_INVALID:
+                result_cache.put(keys[i], x=np.empty(0) if x is None else x, status=status)
+    return solutions, statuses
+
+@profiled()
+def solve_batch(systems, cache=None, result_cache=None):
+    """
+    Solves many augmented systems [A | b] at once without raising on bad systems.
+    Systems are grouped by shape and every group is solved with a single batched np.linalg.solve call;
+    systems larger than BATCHED_CONDITION_MAX_SIZE are solved one by one instead, with the diagonal,
+    triangular or banded solver that detect_structure picks, or with an LU factorization.
+    Each system gets a status: "ok", "ill-conditioned" (solved, but the condition number is above
+    ILL_CONDITIONED_CONDITION), "singular" (no solution is returned) or "invalid" (not an n x (n+1)
+    matrix of finite numbers).
+    Parameters:
+        systems: A stacked (k, n, n+1) array, or any iterable of augmented matrices (which may differ in size).
+        cache (FactorizationCache): Optional. If given, each system is solved through the cache instead of
+            the batched call, so coefficient matrices that repeat are only factored once.
+        result_cache (ResultCache): Optional. A persistent result_cache.ResultCache keyed on the bytes of
+            each augmented matrix; systems solved before, in this or an earlier run, are not solved again.
+    Returns:
+        solutions (list): One numpy.ndarray per system, or None where the status is singular or invalid.
+        statuses (list): One status string per system, in the same order as the input.
+    """
+    if result_cache is not None:
+        return _solve_batch_cached(systems, cache, result_cache)
+    if isinstance(systems, np.ndarray) and systems.ndim == 3:
+        # Already one group: skip the per-system shape checks
+        items = None
+        groups = {systems.shape[1:]: (np.arange(len(systems)), np.asarray(systems, dtype=float))}
+        count = len(systems)
+    else:
+        items = []
+        indices = {}
+        for i, system in enumerate(systems):
+            try:
+                matrix = np.asarray(system, dtype=float)
+            except (TypeError, ValueError):
+                matrix = np.empty(0)  # Not numeric, reported as invalid
+            items.append(matrix)
+            indices.setdefault(matrix.shape, []).append(i)
+        groups = {shape: (np.array(idx), None) for shape, idx in indices.items()}
+        count = len(items)
+
+    solutions = [None] * count
+    statuses = [STATUS_INVALID] * count
+    for shape, (idx, stack) in groups.items():
+        if len(shape) != 2 or shape[0] == 0 or shape[1] != shape[0] + 1:
+            continue
+        if stack is None:
+            stack = np.stack([items[i] for i in idx])
+        finite = np.isfinite(stack).all(axis=(1, 2))
+        idx, stack = idx[finite], stack[finite]
+        if len(idx) == 0:
+            continue
+        if cache is not None:
+            for i, system in zip(idx, stack):
+                try:
+                    factorization = cache.factor(system[:, :-1])
+                except LinAlgError:
+                    statuses[i] = STATUS_SINGULAR
+                    continue
+                solutions[i] = factorization.solve(system[:, -1])
+                statuses[i] = STATUS_ILL_CONDITIONED if factorization.condition > ILL_CONDITIONED_CONDITION else STATUS_OK
+            continue
+        if shape[0] > BATCHED_CONDITION_MAX_SIZE:
+            # An SVD per system would cost several times the solve itself, so each system is factored
+            # once and its condition estimated from the LU factors instead. Scanning for structure first
+            # costs O(n^2), little next to the O(n^3) factorization a banded or triangular system avoids
+            for i, system in zip(idx, stack):
+                A = system[:, :-1]
+                solved = _solve_structured_with_condition(A, system[:, -1])
+                if solved is None:
+                    factors, condition = _factor_with_condition(A, np.linalg.norm(A, 1))
+                    x = None
+                    if condition < SINGULAR_CONDITION:
+                        x = lu_solve(factors, system[:, -1], check_finite=False)
+                else:
+                    x, condition = solved
+                if x is None or not condition < SINGULAR_CONDITION:
+                    statuses[i] = STATUS_SINGULAR
+                    continue
+                solutions[i] = x
+                statuses[i] = STATUS_ILL_CONDITIONED if condition > ILL_CONDITIONED_CONDITION else STATUS_OK
+            continue
+        A, b = stack[:, :, :-1], stack[:, :, -1:]
+        cond = np.linalg.cond(A)
+        solvable = cond < SINGULAR_CONDITION
+        x = np.linalg.solve(A[solvable], b[solvable])[:, :, 0]
+        for i, xi, c in zip(idx[solvable], x, cond[solvable]):
+            solutions[i] = xi
+            statuses[i] = STATUS_ILL_CONDITIONED if c > ILL_CONDITIONED_CONDITION else STATUS_OK
+        for i in idx[~solvable]:
+            statuses[i] = STATUS_SINGULAR
+    return solutions, statuses
+
+def _report_row_error(line_number, message):
+    """Default error handler for iter_matrices: prints the problem and carries on."""
+    print(f"Error: line {line_number}: {message}", file=sys.stderr)
+
+def _bad_value(values):
+    """Returns the first of a row's values that np.loadtxt cannot read as a number, or None."""
+    try:
+        np.loadtxt(io.StringIO(" ".join(values)), ndmin=1)
+        return None
+    except ValueError:
+        pass
+    for value in values:
+        try:
+            np.loadtxt(io.StringIO(value), ndmin=1)
+        except ValueError:
+            return value
+    return None
+
+def _parse_block(lines, first_line, on_error):
+    """
+    Parses the rows of one text matrix with np.loadtxt, or reports every bad row if that fails.
+    Rows are checked with the same parser and against the most common row length in the block, so
+    one short or long row is blamed rather than the rows around it.
+    Parameters:
+        lines (list): The raw rows of the matrix.
+        first_line (int): The line number of the first row, used in error messages.
+        on_error: Called as on_error(line_number, message) for every bad row.
+    Returns:
+        numpy.ndarray: The matrix, or None if any row was bad.
+    """
+    text = "".join(lines).replace(",", " ")
+    try:
+        return np.loadtxt(io.StringIO(text), ndmin=2)
+    except ValueError as e:
+        error = str(e)
+    # Slow path, only for broken blocks: find every offending row
+    rows = [line.replace(",", " ").split() for line in lines]
+    cols = Counter(len(values) for values in rows).most_common(1)[0][0]
+    reported = False
+    for line_number, values in enumerate(rows, start=first_line):
+        bad = _bad_value(values)
+        if bad is not None:
+            on_error(line_number, f"could not convert string to float: {bad!r}")
+            reported = True
+        elif len(values) != cols:
+            on_error(line_number, f"expected {cols} values, found {len(values)}")
+            reported = True
+    if not reported:
+        # Never drop a matrix silently, even if no single row can be blamed
+        on_error(first_line, error)
+    return None
+
+def _iter_array(array):
+    """Yields the matrices stored in a loaded array: the array itself if 2-D, or each slice if 3-D."""
+    if array.ndim == 2:
+        yield array
+    elif array.ndim == 3:
+        # Slices of a memory-mapped array are read from disk only when they are used
+        yield from array
+    else:
+        raise ValueError(f"expected a 2-D or 3-D array, found {array.ndim}-D")
+
+def iter_matrices(source, on_error=_report_row_error):
+    """
+    Lazily yields augmented matrices from a file, so memory use does not grow with the file size.
+    .npy files are memory-mapped and .npz files are read one entry at a time; both may hold a single
+    matrix or a stacked (k, n, n+1) array. Anything else is read as text: rows of numbers separated by
+    whitespace or commas, with blank lines between matrices and # starting a comment line. A matrix
+    with bad rows is reported row by row through on_error and skipped, and reading continues with
+    the next matrix.
+    Parameters:
+        source: A path, or an open text file.
+        on_error: Called as on_error(line_number, message) for every bad text row.
+    Returns:
+        generator: The matrices, as numpy.ndarrays, in file order.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        suffix = os.path.splitext(source)[1].lower()
+        if suffix == ".npy":
+            yield from _iter_array(np.load(source, mmap_mode="r"))
+            return
+        if suffix == ".npz":
+            with np.load(source) as archive:
+                for name in archive.files:
+                    yield from _iter_array(archive[name])
+            return
+        with open(source) as file:
+            yield from iter_matrices(file, on_error)
+        return
+
+    block, first_line = [], 0
+    for line_number, line in enumerate(source, start=1):
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            continue
+        if stripped:
+            if not block:
+                first_line = line_number
+            block.append(line)
+        elif block:
+            matrix = _parse_block(block, first_line, on_error)
+            if matrix is not None:
+                yield matrix
+            block = []
+    if block:
+        matrix = _parse_block(block, first_line, on_error)
+        if matrix is not None:
+            yield matrix
+
+def interactive_matrices():
+    """
+    Yields augmented matrices typed in by the user, asking after each one whether to enter another.
+    This is the interactive prompt as a matrix source, so it can be solved the same way as a file.
+    Returns:
+        generator: The matrices, as numpy.ndarrays.
+    """
     while True:
         # Get the augmented matrix from the user
         matrix = get_matrix_from_user()
@@ -55,13 +698,66 @@ def solve_system():
         # If the user inputted a row with a number of elements that doesn't match the number of columns, prompt them to input another system
         if matrix is None:
             continue
+        yield matrix
 
-        # Separate the matrix A from the column vector b
-        A, b = matrix[:, :-1], matrix[:, -1]
+        # Ask the user if they want to solve another system
+        again = input("Would you like to solve another system? (y/n): ")
+        if again.lower() != "y":
+            break
 
-        # Solve the system
-        try:
-            x = solve(A, b)
+def iter_solutions(matrices, chunk_size=1024, cache=None, result_cache=None):
+    """
+    Solves a stream of augmented matrices in chunks, so only chunk_size systems are held at a time.
+    Parameters:
+        matrices: Any iterable of augmented matrices, e.g. from iter_matrices.
+        chunk_size (int): The number of systems passed to each solve_batch call.
+        cache (FactorizationCache): Optional, passed on to solve_batch.
+        result_cache (ResultCache): Optional, passed on to solve_batch.
+    Returns:
+        generator: (solution, status) pairs in input order, as described in solve_batch.
+    """
+    matrices = iter(matrices)
+    while True:
+        chunk = list(itertools.islice(matrices, chunk_size))
+        if not chunk:
+            return
+        yield from zip(*solve_batch(chunk, cache=cache, result_cache=result_cache))
+
+def solve_system(source=None, result_cache=None):
+    """
+    Continuously prompts the user to input augmented matrices and solves the corresponding
+    systems of equations until the user chooses to stop.
+    If the system of equations cannot be solved, the function will print an error message
+    and prompt the user to input another system.
+    Parameters:
+        source: Optional. A file to read the matrices from instead of prompting, see iter_matrices.
+        result_cache (ResultCache): Optional. A persistent cache of earlier solutions, see solve_batch.
+    Chatgpt assisted with the development of this function.
+    """
+    # Define subscript numbers as a dictionary
+    subscript = {"0": "₀", "1": "₁", "2": "₂", "3": "₃", "4": "₄", "5": "₅", "6": "₆", "7": "₇", "8": "₈", "9": "₉"}
+
+    if source is None:
+        # One system at a time, so each answer is printed before the next prompt
+        solutions = iter_solutions(interactive_matrices(), chunk_size=1, cache=_factorization_cache,
+                                   result_cache=result_cache)
+    else:
+        # No factorization cache here: it would hold the factors of the last matrices of a large file
+        # and bypass the batched solve, for systems that rarely repeat
+        solutions = iter_solutions(iter_matrices(source), result_cache=result_cache)
+
+    for number, (x, status) in enumerate(solutions, start=1):
+        if source is not None:
+            print(f"System {number}:")
+        if x is None:
+            print("Error: Could not solve the system of equations.")
+            if status == STATUS_SINGULAR:
+                print("Details: The coefficient matrix is singular.")
+            else:
+                print("Details: The augmented matrix must have n rows and n+1 columns of numbers.")
+        else:
+            if status == STATUS_ILL_CONDITIONED:
+                print("Warning: The system is ill-conditioned, the solution may be inaccurate.")
             # Round the solutions to the nearest 1e4
             x = np.around(x, decimals=4)
             # Print each solution on a new line with the desired format
@@ -69,15 +765,18 @@ def solve_system():
                 # Convert the index to a string and replace each digit with its subscript equivalent
                 subscript_i = "".join(subscript[digit] for digit in str(i))
                 print(f"x{subscript_i} = {xi}")
-        except Exception as e:
-            print("Error: Could not solve the system of equations.")
-            print("Details:", str(e))
-
-        # Ask the user if they want to solve another system
-        again = input("Would you like to solve another system? (y/n): ")
-        if again.lower() != "y":
-            break
 
 
 if __name__ == "__main__":
-    solve_system()
+    parser = argparse.ArgumentParser(description="Solve systems of linear equations given as augmented matrices.")
+    parser.add_argument("files", nargs="*", help="text, .npy or .npz files to read instead of prompting")
+    parser.add_argument("--result-cache", metavar="PATH", help="a persistent cache of solutions to reuse across runs")
+    args = parser.parse_args()
+    result_cache = ResultCache(args.result_cache) if args.result_cache else None
+    if not args.files:
+        solve_system(result_cache=result_cache)
+    for path in args.files:
+        solve_system(path, result_cache=result_cache)
+    if result_cache is not None:
+        stats = result_cache.stats()
+        print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})", file=sys.stderr)
@@ -0,0 +1,233 @@
+# Headless rendering of the hw4a and hw4b plots to PNG/SVG files.
+#
+#   python render.py OUT_DIR [--format png svg] [--workers N]
+#   renders a sweep of 2x2 distribution panels and the two hw4b equation plots, and prints the
+#   time each figure took.
+#
+# Figures are drawn with the Agg canvas directly, never through pyplot, so nothing here touches
+# pyplot's global figure list and no window is opened. Each worker process builds its figure once
+# and then only updates the data of the existing artists for every further parameter set.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import hw4a
+import hw4b
+from sampling import adaptive_sample
+
+
+def _split(items, parts):
+    """Splits a list into at most parts contiguous, non-empty chunks of nearly equal size."""
+    parts = max(1, min(parts, len(items)))
+    bounds = np.linspace(0, len(items), parts + 1).astype(int)
+    return [items[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _save(figure, base_path, formats):
+    """Writes the figure once per format and returns the written paths."""
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        figure.savefig(path, format=fmt)
+        paths.append(path)
+    return paths
+
+
+class DistributionPanel:
+    """A reusable 2x2 figure in the layout of hw4a.main: normal pdfs with a shaded tail on top and
+    the matching CDFs with the x-value marked below, one distribution per column.
+
+    The artists are created once; update() moves their data to a new parameter set, so rendering a
+    sweep costs one draw per figure instead of rebuilding the axes each time.
+    """
+
+    def __init__(self, figsize=(10, 10)):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        axes = self.figure.subplots(2, 2)
+        self._columns = []
+        for column in range(2):
+            top, bottom = axes[0, column], axes[1, column]
+            pdf_line, = top.plot([], [], 'b-', lw=1, alpha=0.6, label='norm pdf')
+            fill = top.fill_between([0, 1], [0, 0], color='0.5', alpha=0.3)
+            annotation = top.annotate('', xy=(0, 0), xytext=(0, 0), arrowprops=dict(facecolor='black', shrink=0.05),
+                                      fontsize=8)
+            top.set_ylabel('f(x)')
+            cdf_line, = bottom.plot([], [], 'b-', lw=1, alpha=0.6, label='norm cdf')
+            vline = bottom.axvline(x=0, color='k', linestyle='-')
+            hline = bottom.axhline(y=0, color='k', linestyle='-')
+            marker, = bottom.plot([], [], 'o', color='r')
+            bottom.set_ylabel(r'$\Phi(x)=\int_{-\infty}^{x} f(x)dx$')
+            bottom.set_xlabel('x')
+            bottom.set_ylim(0, 1)
+            for ax in (top, bottom):
+                ax.xaxis.tick_top()
+                ax.yaxis.tick_right()
+                ax.tick_params(axis='x', direction='in', which='both', top=True, bottom=True,
+                               labelbottom=ax is bottom, labeltop=False)
+                ax.tick_params(axis='y', direction='in', which='both', left=True, right=True, labelleft=True,
+                               labelright=False)
+            self._columns.append((top, bottom, pdf_line, fill, annotation, cdf_line, vline, hline, marker))
+
+    def update(self, params):
+        """Moves the panel to a new parameter set.
+        Args:
+            params: Two (mean, std_dev, x_value, tail) tuples, one per column, where tail is 'left' to
+                shade P(x<x_value) or 'right' to shade P(x>x_value).
+        """
+        for (mean, std_dev, x_value, tail), column in zip(params, self._columns):
+            top, bottom, pdf_line, fill, annotation, cdf_line, vline, hline, marker = column
+            table = hw4a.standard_normal_table()
+            x = hw4a.generate_data(mean - 5 * std_dev, mean + 5 * std_dev, lambda v: table.pdf(v, mean, std_dev))
+            y = table.pdf(x, mean, std_dev)
+            cdf = table.cdf(x, mean, std_dev)
+            cdf_value = table.cdf(x_value, mean, std_dev)
+            probability = hw4a.normal_tail_probability(mean, std_dev, x_value, tail)
+            pdf_line.set_data(x, y)
+            # The shaded region is the curve over the tail, closed along the x-axis
+            inside = x <= x_value if tail == 'left' else x >= x_value
+            xs = np.concatenate(([x_value] if tail == 'right' else [], x[inside], [x_value] if tail == 'left' else []))
+            ys = table.pdf(xs, mean, std_dev)
+            fill.set_verts([np.column_stack((np.concatenate((xs, xs[::-1])),
+                                             np.concatenate((ys, np.zeros_like(ys)))))])
+            sign = '<' if tail == 'left' else '>'
+            annotation.set_text(f'P(x{sign}{x_value:g}|N({mean:g},{std_dev:g}))={probability:.2f}')
+            annotation.xy = (x_value, 0)
+            annotation.set_position((x_value + (-4.5 if tail == 'left' else 0.5) * std_dev, 0.25 * y.max()))
+            top.set_xlim(x[0], x[-1])
+            top.set_ylim(0, 1.1 * y.max())
+            cdf_line.set_data(x, cdf)
+            vline.set_xdata([x_value, x_value])
+            hline.set_ydata([cdf_value, cdf_value])
+            marker.set_data([x_value], [cdf_value])
+            bottom.set_xlim(x[0], x[-1])
+
+    def render(self, params, base_path, formats=('png',)):
+        """Updates the panel and writes it to base_path.<format> for every format.
+        Returns:
+            list: The written paths.
+        """
+        self.update(params)
+        return _save(self.figure, base_path, formats)
+
+
+class EquationPlot:
+    """A reusable single-axes figure of an hw4b equation with its roots marked, like the plots in
+    hw4b.root_intersection_finder."""
+
+    def __init__(self, figsize=(6.4, 4.8)):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.subplots()
+        self._line, = self.ax.plot([], [])
+        self._roots, = self.ax.plot([], [], 'ro')
+        self.ax.set_xlabel('x')
+        self.ax.set_ylabel('y')
+        self.ax.grid(True)
+
+    def update(self, equation, title, start=-15, stop=15):
+        """Plots the equation over [start, stop] on adaptive samples and marks every root that
+        hw4b.find_all_roots brackets from those same samples."""
+        x, y = adaptive_sample(equation, start, stop)
+        roots = hw4b.find_all_roots(equation, x=x, y=y)
+        self._line.set_data(x, y)
+        self._roots.set_data(roots, np.zeros_like(roots))
+        self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def render(self, equation, title, base_path, formats=('png',)):
+        """Updates the plot and writes it to base_path.<format> for every format.
+        Returns:
+            list: The written paths.
+        """
+        self.update(equation, title)
+        return _save(self.figure, base_path, formats)
+
+
+def _render_panels(jobs):
+    """Worker: renders a chunk of (params, base_path, formats) jobs on one reused DistributionPanel."""
+    panel = DistributionPanel()
+    results = []
+    for params, base_path, formats in jobs:
+        start = time.perf_counter()
+        paths = panel.render(params, base_path, formats)
+        results.append({'paths': paths, 'seconds': time.perf_counter() - start})
+    return results
+
+
+def _render_equations(jobs):
+    """Worker: renders a chunk of (equation, title, base_path, formats) jobs on one reused EquationPlot."""
+    plot = EquationPlot()
+    results = []
+    for equation, title, base_path, formats in jobs:
+        start = time.perf_counter()
+        paths = plot.render(equation, title, base_path, formats)
+        results.append({'paths': paths, 'seconds': time.perf_counter() - start})
+    return results
+
+
+def _run(worker, jobs, max_workers):
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    chunks = _split(jobs, max_workers)
+    if len(chunks) <= 1:
+        return [result for chunk in chunks for result in worker(chunk)]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        return [result for chunk_results in pool.map(worker, chunks) for result in chunk_results]
+
+
+def render_distribution_sweep(param_sets, out_dir, formats=('png',), max_workers=None):
+    """Renders one 2x2 distribution panel per parameter set across a process pool.
+    Args:
+        param_sets: A list of parameter sets, each as accepted by DistributionPanel.update.
+        out_dir: The directory the figures are written to, as panel_<index>.<format>.
+        formats: The file formats to write, e.g. ('png', 'svg').
+        max_workers: The number of worker processes; each renders a contiguous chunk of the sweep.
+    Returns:
+        list: One dict per parameter set, in order, with the written 'paths' and the render 'seconds'.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(params, os.path.join(out_dir, f"panel_{i:04d}"), tuple(formats)) for i, params in enumerate(param_sets)]
+    return _run(_render_panels, jobs, max_workers)
+
+
+def render_equations(equations, out_dir, formats=('png',), max_workers=None):
+    """Renders one root plot per equation across a process pool.
+    Args:
+        equations: A list of (name, equation, title) tuples. Equations must be picklable, e.g.
+            hw4b.equation1 or an hw4b.compile_expression result.
+        out_dir: The directory the figures are written to, as <name>.<format>.
+        formats: The file formats to write.
+        max_workers: The number of worker processes.
+    Returns:
+        list: One dict per equation, in order, with the written 'paths' and the render 'seconds'.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(equation, title, os.path.join(out_dir, name), tuple(formats)) for name, equation, title in equations]
+    return _run(_render_equations, jobs, max_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the hw4a and hw4b plots to files without a display.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--format', nargs='+', default=['png'], dest='formats')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    # The two problems from hw4a.main, with the second mean swept around its original value
+    sweep = [((0, 1, 1, 'left'), (mean, 3, mean + 6, 'right')) for mean in np.arange(165, 186)]
+    results = render_distribution_sweep(sweep, args.out_dir, args.formats, args.workers)
+    results += render_equations([('equation1', hw4b.equation1, 'Plot of x - 3cos(x) = 0'),
+                                 ('equation2', hw4b.equation2, 'Plot of cos(2x) · x³ = 0')],
+                                args.out_dir, args.formats, args.workers)
+    for result in results:
+        print(f"{result['seconds'] * 1e3:8.1f} ms  {', '.join(result['paths'])}")
+    seconds = [result['seconds'] for result in results]
+    print(f"{len(results)} figures, mean {np.mean(seconds) * 1e3:.1f} ms per figure")
@@ -0,0 +1,210 @@
+# A persistent, content-addressed cache of solver results shared across runs and processes.
+#
+#   cache = ResultCache("results.sqlite")
+#   hw4b.find_root(hw4b.equation1, 1.0, result_cache=cache)
+#   hw4c.solve_batch(systems, result_cache=cache)
+#
+# Results are stored in one SQLite file, each as an npz blob under the sha256 digest of what was
+# solved: the solver name, the identity of the equation (or the bytes of the matrix), the inputs and
+# the tolerance. SQLite's write-ahead log and busy timeout make one file safe to share between
+# processes, and the total size of the stored blobs is kept under max_bytes by evicting the least
+# recently used entries.
+
+import hashlib
+import io
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def equation_identity(equation):
+    """Returns a stable name for an equation, or None if it has none that survives across runs.
+
+    hw4b.compile_expression results are identified by their expression and module-level functions by
+    module.qualname. Lambdas and nested functions are not identified, since two different ones can
+    share a name; results for them are not cached.
+
+    Args:
+        equation: An equation callable.
+    Returns:
+        str: The identity, or None.
+    """
+    expression = getattr(equation, 'expression', None)
+    if isinstance(expression, str):
+        return f"expression:{expression}"
+    module = getattr(equation, '__module__', None)
+    qualname = getattr(equation, '__qualname__', None)
+    if module is None or qualname is None or '<' in qualname:
+        return None
+    if module == '__main__':
+        # The script run directly is also importable under its file name; use that so both agree
+        import __main__
+        module = os.path.splitext(os.path.basename(getattr(__main__, '__file__', '') or ''))[0] or module
+    return f"function:{module}.{qualname}"
+
+
+def _update(digest, part):
+    """Feeds one key part to the digest in a canonical, type-tagged form."""
+    if isinstance(part, (list, tuple)):
+        digest.update(f"seq{len(part)}:".encode())
+        for item in part:
+            _update(digest, item)
+    elif isinstance(part, str):
+        data = part.encode()
+        digest.update(f"str{len(data)}:".encode() + data)
+    elif part is None:
+        digest.update(b"none:")
+    else:
+        # Numbers and arrays alike, so 1, 1.0 and np.float64(1) give the same key
+        array = np.ascontiguousarray(part, dtype=float)
+        digest.update(f"arr{array.shape}:".encode())
+        digest.update(array.data)
+
+
+class ResultCache:
+    """A size-bounded LRU cache of solver results in an SQLite file.
+
+    Each process opens its own connection on first use (and again after a fork), so one cache object
+    can be handed to worker processes.
+
+    Attributes:
+        path: The SQLite file.
+        max_bytes: The total blob size kept before the least recently used entries are evicted.
+        hits: The number of lookups answered from the cache by this object.
+        misses: The number of lookups that were not.
+    """
+
+    def __init__(self, path, max_bytes=256 * 2**20, timeout=30.0):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Connections cannot be pickled; the receiving process opens its own
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
+
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            # isolation_level=None: every statement commits on its own unless a transaction is begun
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(*parts):
+        """Returns the cache key of the given parts: a sha256 digest of their canonical encoding.
+
+        Args:
+            *parts: Strings, numbers, arrays, None, or lists and tuples of these.
+        Returns:
+            str: The hex digest.
+        """
+        digest = hashlib.sha256()
+        _update(digest, parts)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Looks up a result and counts the hit or miss.
+
+        Args:
+            key: A key from ResultCache.key.
+        Returns:
+            dict: The stored arrays by name, or None if the key is not cached.
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        with np.load(io.BytesIO(row[0])) as data:
+            return {name: data[name] for name in data.files}
+
+    def put(self, key, **arrays):
+        """Stores a result as an npz blob and evicts old entries if the cache is over max_bytes.
+
+        Args:
+            key: A key from ResultCache.key.
+            **arrays: The arrays (or values convertible to arrays) that make up the result.
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        value = buffer.getvalue()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                               (key, value, len(value), time.time()))
+            total, = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+            if total > self.max_bytes:
+                self._evict(connection, total - self.max_bytes)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _evict(connection, excess):
+        """Deletes least recently used entries until at least excess bytes are freed."""
+        freed = 0
+        doomed = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY accessed"):
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups answered from the cache, or 0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Returns the hit/miss counters of this object and the size of the shared cache file.
+
+        Returns:
+            dict: 'hits', 'misses', 'hit_rate', 'entries' and 'bytes'.
+        """
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'entries': entries,
+                'bytes': size}
+
+    def clear(self):
+        """Deletes every stored result and resets the counters."""
+        self._connect().execute("DELETE FROM results")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """Closes this process's connection; the cache reopens it on next use."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
@@ -0,0 +1,77 @@
+# Adaptive sampling of curves for plotting and root bracketing.
+#
+# hw4a.generate_data and the hw4b plots use fixed linspace grids, which spend most of their points
+# on flat stretches and can still be too coarse where a curve bends sharply. adaptive_sample puts
+# the points where straight lines between samples would visibly miss the curve instead.
+
+import numpy as np
+
+
+def adaptive_sample(func, start, stop, tol=None, rel_tol=1e-3, initial=33, max_points=20000):
+    """Samples a vectorized function on [start, stop] densely where it curves and sparsely where it is flat.
+
+    Starting from a uniform grid, the curve is drawn as a line across each pair of neighbouring
+    intervals, and the function is evaluated at the quarter points of that span. The largest
+    difference between the function at the quarter and middle points and the straight line through the
+    span's end points is the span's error. A span within the tolerance is done; the halves of any
+    other span are checked the same way, each reusing one of the span's quarter points as its middle.
+    The three points checked per span also catch S-shaped stretches whose middle happens to lie on the
+    line. Refinement stops when every span is within the tolerance, is narrower than rel_tol of the
+    x-range (a pixel, at the default 1e-3 on a 1000 px wide plot), or max_points is reached. All new
+    points of one pass are evaluated in a single vectorized call, and every evaluated point is kept in
+    the output. The error is only checked at those points, so a feature narrower than a quarter of the
+    starting grid spacing can still be missed.
+
+    The savings are on curves with flat stretches: for the normal pdfs benchmarks/bench_sampling.py
+    finds 1.1-1.7x fewer evaluations than a uniform grid with the same worst error. Where the curvature
+    is spread over the whole range, as for x - 3cos(x), or at tight tolerances on cos(2x)·x³, a
+    uniform grid needs as few or fewer points.
+
+    Args:
+        func: A vectorized function of x.
+        start: The left end of the interval.
+        stop: The right end of the interval.
+        tol: The absolute error allowed between the curve and the lines joining the samples. By default
+            rel_tol times the range of the sampled values, about one pixel of plot height.
+        rel_tol: The relative tolerance used for the default tol and for the smallest interval width.
+        initial: The number of points in the starting uniform grid, made odd if it is not. It must
+            resolve every feature of the curve at least coarsely, since refinement only happens where
+            the grid already sees an error.
+        max_points: A cap on the total number of samples.
+    Returns:
+        tuple: The sorted sample points x and the function values y, ready for plotting or for
+        hw4b.find_all_roots(..., x=x, y=y).
+    """
+    x = np.linspace(start, stop, 2 * (initial // 2) + 1)
+    y = np.asarray(func(x), dtype=float)
+    min_width = abs(stop - start) * rel_tol
+    # Indices (into x) of the left ends of the spans still to be checked; each span runs from x[i] to
+    # x[i + 2], with its middle point x[i + 1] already evaluated
+    pending = np.arange(0, len(x) - 2, 2)
+
+    while pending.size and len(x) < max_points:
+        pending = pending[: (max_points - len(x)) // 2]
+        a, m, b = x[pending], x[pending + 1], x[pending + 2]
+        y_a, y_m, y_b = y[pending], y[pending + 1], y[pending + 2]
+        quarters = np.concatenate((0.5 * (a + m), 0.5 * (m + b)))
+        y_quarters = np.asarray(func(quarters), dtype=float)
+        y_left, y_right = np.split(y_quarters, 2)
+        error = np.maximum.reduce([np.abs(y_m - 0.5 * (y_a + y_b)),
+                                   np.abs(y_left - 0.25 * (3 * y_a + y_b)),
+                                   np.abs(y_right - 0.25 * (y_a + 3 * y_b))])
+        if tol is not None:
+            limit = tol
+        else:
+            values = np.concatenate((y, y_quarters))
+            values = values[np.isfinite(values)]
+            limit = rel_tol * np.ptp(values) if values.size else np.inf
+        split = (error > limit) & (m - a > min_width)
+
+        # Merge the quarter points in, so every span becomes four intervals and each of its halves is a
+        # span with a known middle; the halves of every span that failed the check are checked next
+        position = np.column_stack((pending + 1, pending + 2)).ravel()
+        x = np.insert(x, position, np.column_stack(np.split(quarters, 2)).ravel())
+        y = np.insert(y, position, np.column_stack((y_left, y_right)).ravel())
+        left = pending[split] + 2 * np.arange(len(pending))[split]
+        pending = np.sort(np.concatenate((left, left + 2)))
+    return x, y
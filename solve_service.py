@@ -0,0 +1,427 @@
+# A local asyncio service that answers root-finding and linear-solve requests from many clients.
+#
+#   python solve_service.py [--host 127.0.0.1 --port 8765 | --unix PATH] [--window 0.005] [--workers N]
+#
+# Clients send one JSON request per line and receive one JSON response per line, matched by "id".
+# Responses are written as soon as they are ready, so they can arrive out of order.
+#   {"id": 1, "op": "root", "equation": "equation1", "guess": 1.0, "tolerance": 1e-6}
+#       -> {"id": 1, "root": 1.1701..., "residual": 1e-16}      (root is null if none was found)
+#   {"id": 2, "op": "solve", "matrix": [[2, 1, 3], [1, 3, 5]]}
+#       -> {"id": 2, "x": [0.8, 1.4], "status": "ok"}           (x is null unless solved, see hw4c.solve_batch)
+#   {"id": 3, "op": "job", "job": {...}}                        any hw4b batch-mode job, see hw4b.solve_job
+#   {"id": 4, "op": "stats"}                                    counters and latency percentiles
+# A request may carry its own "timeout" in seconds; one that is not answered in time gets
+# {"id": ..., "error": "timeout"}. Malformed requests get an "error" instead of closing the connection.
+#
+# Requests arriving within one batching window are sent to a worker process together: root requests
+# for the same equation and tolerance become one vectorized hw4b.find_roots call, and all solve
+# requests one hw4c.solve_batch call. Pending requests are held in a bounded queue; when it is full,
+# connections stop being read until there is room again (backpressure). A failure while solving one
+# request, or one group of root requests, is answered with an "error" for those requests only.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import hw4b
+import hw4c
+
+# The longest request or response line read, in bytes; a 1000 x 1001 solve request is about 20 MiB
+LINE_LIMIT = 64 * 2**20
+
+
+def _error(e):
+    return {'error': f"{type(e).__name__}: {e}"}
+
+
+def _solve_roots(equation, tolerance, guesses):
+    roots, residuals, _ = hw4b.find_roots(hw4b.get_equation(equation), guesses, tolerance, unique=False)
+    return [{'root': None, 'residual': float(r)} if np.isnan(x) else {'root': float(x), 'residual': float(r)}
+            for x, r in zip(roots, residuals)]
+
+
+def _solve_systems(matrices):
+    solutions, statuses = hw4c.solve_batch(matrices)
+    return [{'x': None if x is None else x.tolist(), 'status': status} for x, status in zip(solutions, statuses)]
+
+
+def solve_requests(requests):
+    """Solves one batch of root, solve and job requests; runs in a worker process.
+
+    Args:
+        requests: A list of decoded requests with an "op" of "root", "solve" or "job".
+    Returns:
+        list: One result dict per request, in order, without the id.
+    """
+    results = [None] * len(requests)
+    roots = {}
+    systems = []
+    for i, request in enumerate(requests):
+        try:
+            if request['op'] == 'root':
+                key = (request['equation'], float(request.get('tolerance', 1e-6)))
+                roots.setdefault(key, []).append((i, float(request['guess'])))
+            elif request['op'] == 'solve':
+                systems.append((i, request['matrix']))
+            elif request['op'] == 'job':
+                results[i] = hw4b.solve_job(request['job'])
+                results[i].pop('id', None)
+            else:
+                results[i] = {'error': f"unknown op {request['op']!r}"}
+        except KeyError as e:
+            results[i] = {'error': f"missing field {e}"}
+        except (TypeError, ValueError) as e:
+            results[i] = {'error': str(e)}
+        except Exception as e:
+            results[i] = _error(e)
+
+    # Every request in a group shares the equation, so a group fails as a whole
+    for (equation, tolerance), items in roots.items():
+        try:
+            solved = _solve_roots(equation, tolerance, [guess for _, guess in items])
+        except (KeyError, TypeError, ValueError) as e:
+            solved = [{'error': f"unknown equation {e}" if isinstance(e, KeyError) else str(e)}] * len(items)
+        except Exception as e:
+            solved = [_error(e)] * len(items)
+        for (i, _), result in zip(items, solved):
+            results[i] = result
+
+    if systems:
+        matrices = [matrix for _, matrix in systems]
+        try:
+            solved = _solve_systems(matrices)
+        except Exception:
+            # Some system broke the batched solve; solve them one at a time so only it gets an error
+            solved = []
+            for matrix in matrices:
+                try:
+                    solved.extend(_solve_systems([matrix]))
+                except Exception as e:
+                    solved.append(_error(e))
+        for (i, _), result in zip(systems, solved):
+            results[i] = result
+    return results
+
+
+async def _read_line(reader):
+    """Reads one line from a stream.
+
+    Returns:
+        bytes: The line, b"" at the end of the stream, or None if the line was longer than the stream's
+        limit; the rest of that line is skipped.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+    while True:
+        # Drop what was buffered and keep reading until the end of the long line
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+class SolveService:
+    """Accepts JSON-lines requests over TCP or a Unix socket and solves them in batches.
+
+    Attributes:
+        window: Seconds to keep collecting requests after the first one of a batch arrives.
+        max_batch: The largest number of requests sent to a worker at once.
+        timeout: The default seconds a request may take before it is answered with a timeout error.
+    """
+
+    def __init__(self, window=0.005, max_batch=512, max_pending=4096, timeout=30.0, max_workers=None,
+                 executor=None):
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._max_pending = max_pending
+        self._max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._batcher = None
+        self._in_flight = None
+        self._server = None
+        self._connections = set()
+        self._latencies = deque(maxlen=10000)
+        self._counts = {'requests': 0, 'errors': 0, 'timeouts': 0, 'batches': 0, 'batched_requests': 0}
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        """Starts listening and batching; with a path, on a Unix socket instead of TCP.
+
+        Returns:
+            The asyncio server, e.g. for its .sockets when port 0 was asked for.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        self._queue = asyncio.Queue(self._max_pending)
+        # At most one batch per worker is in flight, so batches queue here and keep growing
+        self._in_flight = asyncio.Semaphore(self._max_workers or os.cpu_count() or 1)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=LINE_LIMIT)
+        return self._server
+
+    async def close(self):
+        """Stops accepting connections, cancels the batcher and shuts the worker pool down."""
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        """Returns the request counters, the mean batch size, the queue depth and the p50/p90/p99 latencies in ms."""
+        latencies = list(self._latencies)
+        counts = dict(self._counts)
+        counts['mean_batch'] = counts['batched_requests'] / counts['batches'] if counts['batches'] else 0.0
+        counts['queued'] = self._queue.qsize() if self._queue is not None else 0
+        for q in (50, 90, 99):
+            value = _percentile(latencies, q)
+            counts[f'p{q}_ms'] = None if value is None else value * 1e3
+        return counts
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        try:
+            while True:
+                line = await _read_line(reader)
+                if line is None:
+                    await self._write(writer, lock, {'id': None, 'error': f"request longer than {LINE_LIMIT} bytes"})
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                received = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    await self._write(writer, lock, {'id': None, 'error': f"invalid request: {e}"})
+                    continue
+                if request.get('op') == 'stats':
+                    await self._write(writer, lock, {'id': request.get('id'), 'stats': self.stats()})
+                    continue
+                future = asyncio.get_running_loop().create_future()
+                # Waiting for room here stops this connection from being read: the backpressure
+                await self._queue.put((request, future))
+                task = asyncio.create_task(self._respond(request, future, received, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            pass  # The service is closing
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._connections.discard(connection)
+            writer.close()
+
+    async def _respond(self, request, future, received, writer, lock):
+        self._counts['requests'] += 1
+        try:
+            result = await asyncio.wait_for(future, request.get('timeout', self.timeout))
+        except asyncio.TimeoutError:
+            self._counts['timeouts'] += 1
+            result = {'error': 'timeout'}
+        except Exception as e:  # The worker failed on the whole batch
+            result = {'error': f"{type(e).__name__}: {e}"}
+        if 'error' in result:
+            self._counts['errors'] += 1
+        self._latencies.append(time.perf_counter() - received)
+        await self._write(writer, lock, {'id': request.get('id'), **result})
+
+    @staticmethod
+    async def _write(writer, lock, response):
+        async with lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass  # The client left; its remaining responses are dropped
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Requests that already timed out are not worth solving
+            batch = [(request, future) for request, future in batch if not future.done()]
+            if batch:
+                await self._in_flight.acquire()
+                asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            self._counts['batches'] += 1
+            self._counts['batched_requests'] += len(batch)
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self._executor, solve_requests, [r for r, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.release()
+
+
+class SolveClient:
+    """An asyncio client for SolveService; every call returns the matching response dict.
+
+        async with await SolveClient.connect(port=8765) as client:
+            root = (await client.root("equation1", 1.0))["root"]
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._pending = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, path=None):
+        """Connects to a service over TCP, or over the Unix socket at path."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to the solve service closed"))
+            self._pending.clear()
+
+    async def request(self, op, **fields):
+        """Sends one request and waits for its response.
+
+        Args:
+            op: "root", "solve", "job" or "stats".
+            **fields: The other request fields, e.g. equation=, guess=, tolerance=, matrix=, timeout=.
+        Returns:
+            dict: The response, including its "id".
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write((json.dumps({'id': request_id, 'op': op, **fields}) + "\n").encode())
+        await self._writer.drain()
+        return await future
+
+    async def root(self, equation, guess, tolerance=1e-6, **fields):
+        return await self.request('root', equation=equation, guess=guess, tolerance=tolerance, **fields)
+
+    async def solve(self, matrix, **fields):
+        return await self.request('solve', matrix=np.asarray(matrix, dtype=float).tolist(), **fields)
+
+    async def stats(self):
+        return (await self.request('stats'))['stats']
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
+
+
+async def _serve(args):
+    service = SolveService(window=args.window, max_batch=args.max_batch, max_pending=args.max_pending,
+                           timeout=args.timeout, max_workers=args.workers)
+    server = await service.start(args.host, args.port, args.unix)
+    for sock in server.sockets:
+        print(f"Serving on {sock.getsockname()}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve hw4b root finding and hw4c linear solves as JSON lines.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--window', type=float, default=0.005, help="seconds to collect a batch (default 0.005)")
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--max-pending', type=int, default=4096, help="queued requests before reading pauses")
+    parser.add_argument('--timeout', type=float, default=30.0, help="default per-request timeout in seconds")
+    parser.add_argument('--workers', type=int, default=None)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass